@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return result, timings
+
+def report(results, size, name, timings, rows=None, calls=1):
+    best = min(timings) / calls
+    results.append({
+        "size": size,
+        "bench": name,
+        "first_s": timings[0] / calls,
+        "best_s": best,
+        "rows_per_s": rows / best if rows and best > 0 else None,
+        "peak_rss_mb": peak_rss_mb(),
+    })
+
+def run_size(size, scales, repeat, queries, load_max_rows, seed):
+    from synthetic import synthetic_orders, write_xlsx
+    from pizza_data import load_data, build_calendar, build_sales_cube, build_flavors, IngredientIndex
+    from modelo import ModeloCoocorrencia
+    from views import weekday_view, days_topN_view, peak_hour_view, flavors_view
+    from pizza_gen import pizza_plot, clear_image_cache
+    from streaming import load_sales
+
+    results = []
+    df, timings = measure(lambda: synthetic_orders(size, seed=seed), 1)
+    report(results, size, "synthetic_orders", timings, size)
+
+    if size <= load_max_rows:
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "orders.xlsx")
+            write_xlsx(df, path)
+            _, timings = measure(lambda: load_data(path), 1)
+            report(results, size, "load_data", timings, size)
+            _, timings = measure(lambda: load_data(path), repeat)
+            report(results, size, "load_data_snapshot", timings, size)
+            _, timings = measure(lambda: load_sales(path), 1)
+            report(results, size, "load_sales", timings, size)
+            _, timings = measure(lambda: load_sales(path), repeat)
+            report(results, size, "load_sales_cached", timings, size)
+
+    calendar = build_calendar(df["order_date"])
+    cube, timings = measure(lambda: build_sales_cube(df, calendar), repeat)
+    report(results, size, "build_sales_cube", timings, size)
+    flavors = build_flavors(df)
+    ingredient_index = IngredientIndex(flavors)
+
+    modelo, timings = measure(lambda: ModeloCoocorrencia(df), repeat)
+    report(results, size, "ModeloCoocorrencia", timings, size)
+
+    rng = np.random.default_rng(seed)
+    vocabulary = list(modelo.vocabulario)
+    selections = [
+        [vocabulary[i] for i in rng.choice(len(vocabulary), rng.integers(0, 4), replace=False)]
+        for _ in range(queries)
+    ]
+    _, timings = measure(lambda: [modelo.top_k_sugestoes(10, selection) for selection in selections], repeat)
+    report(results, size, "top_k_sugestoes", timings, calls=queries)
+
+    months = list(range(1, 13))
+    weekday_df, timings = measure(lambda: weekday_view(months, cube), repeat)
+    report(results, size, "weekday_view", timings, size)
+    _, timings = measure(lambda: days_topN_view(months, 10, cube, calendar), repeat)
+    report(results, size, "days_topN_view", timings, size)
+    _, timings = measure(lambda: peak_hour_view(months, cube), repeat)
+    report(results, size, "peak_hour_view", timings, size)
+    _, timings = measure(lambda: flavors_view(5, 10, vocabulary[:1], flavors, ingredient_index), repeat)
+    report(results, size, "flavors_view", timings, size)
+
+    for scale in scales:
+        clear_image_cache()
+        _, timings = measure(lambda: pizza_plot(weekday_df.index, weekday_df["quantity"], base_scale=scale), repeat)
+        report(results, size, f"pizza_plot@{scale:g}", timings)
+    return results
+
+def run_child(args):
+    os.chdir(REPO_DIR)
+    sys.path.insert(0, REPO_DIR)
+    results = run_size(args.child, args.scales, args.repeat, args.queries, args.load_max_rows, args.seed)
+    json.dump(results, sys.stdout)
+
+def run_sizes(args):
+    results = []
+    for size in args.sizes:
+        command = [sys.executable, os.path.abspath(__file__), "--child", str(size),
+            "--scales", *map(str, args.scales), "--repeat", str(args.repeat),
+            "--queries", str(args.queries), "--load-max-rows", str(args.load_max_rows),
+            "--seed", str(args.seed)]
+        output = subprocess.run(command, check=True, stdout=subprocess.PIPE, text=True).stdout
+        size_results = json.loads(output)
+        for result in size_results:
+            print_result(result)
+        results.extend(size_results)
+    return results
+
+def print_result(result):
+    throughput = f"{result['rows_per_s']:>14,.0f} rows/s" if result["rows_per_s"] else " " * 21
+    print(f"{result['size']:>10,} {result['bench']:<22} {result['best_s'] * 1000:>12.3f} ms"
+        f" {throughput} {result['peak_rss_mb']:>10.1f} MB", flush=True)
+
+def compare(results, baseline, tolerance, min_delta):
+    reference = {(item["size"], item["bench"]): item for item in baseline}
+    regressions = []
+    for result in results:
+        previous = reference.get((result["size"], result["bench"]))
+        if previous is None:
+            continue
+        for field, floor in (("best_s", min_delta), ("peak_rss_mb", 16.)):
+            old, new = previous[field], result[field]
+            if new > old * (1 + tolerance) and new - old > floor:
+                regressions.append(f"{result['size']:,} {result['bench']} {field}: {old:.4g} -> {new:.4g}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do dashboard com pedidos sintéticos")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--scales", type=float, nargs="+", default=[0.25, 0.5, 1.0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--load-max-rows", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline", default="bench_baseline.json")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-delta", type=float, default=0.002)
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        return run_child(args)
+
+    results = run_sizes(args)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=1)
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=1)
+        return
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance, args.min_delta)
+        for regression in regressions:
+            print(f"REGRESSÃO {regression}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
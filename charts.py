@@ -0,0 +1,74 @@
+import plotly.graph_objects as go
+from plotly.colors import sample_colorscale
+from perf import timed
+
+def plasma_colors(label_len):
+    return sample_colorscale('Plasma', [i/max(label_len-1, 1) for i in range(label_len)])
+
+def bar_figure(x, y, title, colors=None, orientation=None):
+    return go.Figure(
+        data = [
+            go.Bar(x=x, y=y, marker_color=colors, orientation=orientation),
+        ],
+        layout=dict(
+            title=title
+        )
+    )
+
+@timed()
+def weekday_figure(weekday_df):
+    label_len = len(weekday_df.index)
+    return go.Figure(
+        data = [
+            go.Bar(x=weekday_df.index, y=weekday_df['quantity'], marker_color=plasma_colors(label_len)),
+            go.Scatter(x=weekday_df.index,
+                y=[weekday_df['quantity'].mean()]*label_len,
+                mode="lines", line=dict(color="white", dash="dash"),
+                name=f"Média: {weekday_df['quantity'].mean()}"
+            ),
+        ],
+        layout=dict(
+            title="Movimento por dias da semana"
+        )
+    )
+
+@timed()
+def days_figures(top_days_df, bot_days_df, N):
+    colors = plasma_colors(len(top_days_df.index))
+    return (
+        bar_figure(top_days_df['order_date'], top_days_df['quantity'],
+            f"Top {N} dias mais movimentados", colors),
+        bar_figure(bot_days_df['order_date'], bot_days_df['quantity'],
+            f"Bottom {N} dias mais movimentados", colors),
+    )
+
+@timed()
+def peak_hour_figure(peak_hour_tuples):
+    return bar_figure(peak_hour_tuples[0], peak_hour_tuples[1], "Pedidos de pizza por horário",
+        plasma_colors(len(peak_hour_tuples[0])))
+
+@timed()
+def range_figures(range_weekdays, range_days, hours):
+    return (
+        bar_figure(range_weekdays.index, range_weekdays.values,
+            f"Movimento por dias da semana ({hours[0]}h~{hours[1]}h)",
+            plasma_colors(len(range_weekdays.index))),
+        bar_figure(range_days.index, range_days.values,
+            f"Movimento diário ({hours[0]}h~{hours[1]}h)"),
+    )
+
+@timed()
+def flavors_figures(topN, botN, N):
+    colors = plasma_colors(len(topN.index))
+    return (
+        bar_figure(topN['pizza_name'], topN['quantity'], f"Top {N} sabores", colors),
+        bar_figure(botN['pizza_name'], botN['quantity'], f"Bot {N} sabores", colors),
+    )
+
+@timed()
+def ingredients_figures(top_features, bot_features, N):
+    colors = plasma_colors(len(top_features[0]))
+    return (
+        bar_figure(top_features[1], top_features[0], f"Top {N} ingredientes", colors, "h"),
+        bar_figure(bot_features[1], bot_features[0], f"Bot {N} ingredientes", colors, "h"),
+    )
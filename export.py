@@ -0,0 +1,187 @@
+import argparse
+import base64
+import importlib.util
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+FORMATS = ("png", "svg", "html")
+DEFAULT_FILTERS = {
+    "source": "pizza_dataset.xlsx",
+    "months": list(range(1, 13)),
+    "N": 5,
+    "Npizzas": 5,
+    "Nsabores": 10,
+    "filtros_ingredientes": [],
+    "hour_window": [0, 24],
+    "date_range": None,
+    "pizza_scale": 0.5,
+}
+
+_sales = dict()
+
+def _init_worker():
+    os.chdir(REPO_DIR)
+
+def load_source(source):
+    if source not in _sales:
+        from streaming import load_sales
+        from pizza_data import IngredientIndex, SalesRangeIndex
+        calendar, cube, flavors, _ = load_sales(source)
+        _sales[source] = (calendar, cube, flavors, SalesRangeIndex(cube), IngredientIndex(flavors))
+    return _sales[source]
+
+def months_date_range(range_index, months):
+    import numpy as np
+    import pandas as pd
+    selected = np.isin(pd.DatetimeIndex(range_index.dates).month, months)
+    if not selected.any():
+        return None
+    first, last = np.flatnonzero(selected)[[0, -1]]
+    if not selected[first:last + 1].all():
+        return None
+    return pd.Timestamp(range_index.dates[first]), pd.Timestamp(range_index.dates[last])
+
+def filter_outputs(filters):
+    from views import weekday_view, days_topN_view, days_botN_view, peak_hour_view, flavors_view
+    from charts import (weekday_figure, days_figures, peak_hour_figure, range_figures,
+        flavors_figures, ingredients_figures)
+    calendar, cube, flavors, range_index, ingredient_index = load_source(filters["source"])
+    months, N = filters["months"], filters["N"]
+
+    weekday_df = weekday_view(months, cube)
+    peak_hour_tuples = peak_hour_view(months, cube)
+    date_range = filters["date_range"] or months_date_range(range_index, months)
+    hours = tuple(filters["hour_window"])
+    topN, botN, top_features, bot_features = flavors_view(
+        filters["Npizzas"], filters["Nsabores"], filters["filtros_ingredientes"], flavors, ingredient_index)
+
+    figures = dict()
+    figures["weekday"] = weekday_figure(weekday_df)
+    figures["days_top"], figures["days_bottom"] = days_figures(
+        days_topN_view(months, N, cube, calendar), days_botN_view(months, N, cube, calendar), N)
+    figures["peak_hour"] = peak_hour_figure(peak_hour_tuples)
+    if date_range is not None:
+        start, end = date_range
+        figures["range_weekdays"], figures["range_days"] = range_figures(
+            range_index.weekday_totals(start, end, hours), range_index.daily_totals(start, end, hours), hours)
+    figures["flavors_top"], figures["flavors_bottom"] = flavors_figures(topN, botN, filters["Npizzas"])
+    figures["ingredients_top"], figures["ingredients_bottom"] = ingredients_figures(
+        top_features, bot_features, filters["Nsabores"])
+
+    pizzas = {
+        "weekday_pizza": (list(weekday_df.index), list(weekday_df["quantity"])),
+        "peak_hour_pizza": (peak_hour_tuples[2], peak_hour_tuples[3]),
+    }
+    return figures, {name: plot for name, plot in pizzas.items() if sum(plot[1]) > 0}
+
+def render_pizza(labels, values, fmt, base_scale):
+    from pizza_gen import pizza_plot, pizza_plot_svg
+    if fmt == "svg":
+        return pizza_plot_svg(labels, values, base_scale=base_scale).encode()
+    buffer = io.BytesIO()
+    pizza_plot(labels, values, base_scale=base_scale).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def _write(path, data):
+    with open(path, "wb") as file:
+        file.write(data)
+    return path
+
+def _report_html(name, figures, pizzas):
+    parts = [f"<html><head><meta charset='utf-8'><title>{name}</title></head><body><h1>{name}</h1>"]
+    for i, figure in enumerate(figures.values()):
+        parts.append(figure.to_html(full_html=False, include_plotlyjs="cdn" if i == 0 else False))
+    for pizza_name, data in pizzas.items():
+        if data.startswith(b"<svg"):
+            parts.append(data.decode())
+        else:
+            parts.append(f"<img alt='{pizza_name}' src='data:image/png;base64,{base64.b64encode(data).decode()}'/>")
+    parts.append("</body></html>")
+    return "".join(parts).encode()
+
+def export_filter_set(filters, out_dir, formats, threads):
+    start = time.perf_counter()
+    folder = os.path.join(out_dir, filters["name"])
+    os.makedirs(folder, exist_ok=True)
+    figures, pizzas = filter_outputs(filters)
+    chart_images = importlib.util.find_spec("kaleido") is not None
+    written = []
+    with ThreadPoolExecutor(threads) as pool:
+        rendered = {
+            (name, fmt): pool.submit(render_pizza, labels, values, fmt, filters["pizza_scale"])
+            for name, (labels, values) in pizzas.items()
+            for fmt in ("png", "svg") if fmt in formats or (fmt == "svg" and "html" in formats)
+        }
+        for (name, fmt), future in rendered.items():
+            if fmt in formats:
+                written.append(_write(os.path.join(folder, f"{name}.{fmt}"), future.result()))
+        if chart_images:
+            images = {
+                (name, fmt): pool.submit(figure.to_image, format=fmt)
+                for name, figure in figures.items() for fmt in ("png", "svg") if fmt in formats
+            }
+            for (name, fmt), future in images.items():
+                written.append(_write(os.path.join(folder, f"{name}.{fmt}"), future.result()))
+    if "html" in formats:
+        report_pizzas = {name: rendered[(name, "svg")].result() for name in pizzas}
+        written.append(_write(os.path.join(folder, "report.html"),
+            _report_html(filters["name"], figures, report_pizzas)))
+    return filters["name"], written, chart_images, time.perf_counter() - start
+
+def filter_sets(filters_path=None, per_month=False, sources=()):
+    base_sets = [{"name": "todos"}]
+    if filters_path is not None:
+        with open(filters_path) as file:
+            base_sets = [dict({"name": f"conjunto_{i:02d}"}, **filters) for i, filters in enumerate(json.load(file))]
+    if sources:
+        base_sets = [
+            dict(filters, source=source, name=f"{os.path.splitext(os.path.basename(source))[0]}_{filters['name']}")
+            for source in sources for filters in base_sets
+        ]
+    if per_month:
+        base_sets = [
+            dict(filters, months=[month], name=f"{filters['name']}_{month:02d}")
+            for filters in base_sets for month in range(1, 13)
+        ]
+    sets = []
+    for filters in base_sets:
+        filters = dict(DEFAULT_FILTERS, **filters)
+        filters["source"] = os.path.abspath(filters["source"])
+        sets.append(filters)
+    return sets
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta os gráficos do dashboard sem a interface")
+    parser.add_argument("--filters", help="JSON com uma lista de conjuntos de filtros")
+    parser.add_argument("--source", nargs="+", default=(), help="uma fonte de pedidos por loja")
+    parser.add_argument("--per-month", action="store_true")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--out", default="relatorios")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    sets = filter_sets(args.filters, args.per_month, args.source)
+    out_dir = os.path.abspath(args.out)
+    for source in dict.fromkeys(filters["source"] for filters in sets):
+        load_source(source)
+
+    start = time.perf_counter()
+    missing_chart_images = False
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker) as pool:
+        jobs = [pool.submit(export_filter_set, filters, out_dir, args.formats, args.threads) for filters in sets]
+        for job in jobs:
+            name, written, chart_images, elapsed = job.result()
+            missing_chart_images |= not chart_images
+            print(f"{name}: {len(written)} arquivos em {elapsed:.2f}s", flush=True)
+    elapsed = time.perf_counter() - start
+    print(f"{len(sets)} conjuntos em {elapsed:.2f}s ({len(sets) / elapsed:.2f} conjuntos/s, {args.workers} processos)")
+    if missing_chart_images and set(args.formats) & {"png", "svg"}:
+        print("kaleido não instalado: gráficos exportados apenas no report.html")
+
+if __name__ == "__main__":
+    main()
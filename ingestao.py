@@ -0,0 +1,97 @@
+import datetime
+import os
+import threading
+import time
+import pandas as pd
+from pizza_data import (add_to_cube, add_to_flavors, cube_segments, extend_calendar, IngredientIndex,
+    SalesCube, SalesRangeIndex)
+
+IDADE_MINIMA = float(os.environ.get("PIZZA_ORDERS_MIN_AGE", "2"))
+COLUNAS_PEDIDO = ["order_date", "order_time", "pizza_name", "pizza_ingredients", "quantity", "total_price"]
+
+def ler_lote(caminho):
+    if caminho.endswith(".jsonl"):
+        lote = pd.read_json(caminho, lines=True, dtype=False, convert_dates=False)
+    else:
+        lote = pd.read_csv(caminho)
+    return normalizar_lote(lote, caminho)
+
+def normalizar_lote(lote, origem):
+    faltando = [coluna for coluna in COLUNAS_PEDIDO if coluna not in lote.columns]
+    if faltando:
+        raise ValueError(f"{origem}: colunas ausentes {faltando}")
+    lote["order_date"] = pd.to_datetime(lote["order_date"])
+    if len(lote) == 0 or not isinstance(lote["order_time"].iloc[0], datetime.time):
+        lote["order_time"] = pd.to_datetime(lote["order_time"].astype(str), format="%H:%M:%S").dt.time
+    lote["quantity"] = lote["quantity"].astype("int64")
+    lote["total_price"] = lote["total_price"].astype(float)
+    return lote
+
+
+class PastaDePedidos():
+    def __init__(self, pasta, idade_minima=IDADE_MINIMA):
+        self.pasta = pasta
+        self.idade_minima = idade_minima
+        self.vistos = set()
+
+    def novos_arquivos(self):
+        if not os.path.isdir(self.pasta):
+            return []
+        agora = time.time()
+        novos = []
+        for entrada in os.scandir(self.pasta):
+            if not entrada.name.endswith((".csv", ".jsonl")) or entrada.name in self.vistos:
+                continue
+            stat = entrada.stat()
+            if agora - stat.st_mtime < self.idade_minima:
+                continue
+            novos.append((stat.st_mtime_ns, entrada.name, entrada.path))
+        return [(caminho, nome) for _, nome, caminho in sorted(novos)]
+
+
+class Vendas():
+    def __init__(self, calendar, cube, range_index, modelo, flavors, ingredient_index=None):
+        self.calendar = calendar
+        self.cube = cube
+        self.range_index = range_index
+        self.modelo = modelo
+        self.flavors = flavors
+        self.ingredient_index = IngredientIndex(flavors) if ingredient_index is None else ingredient_index
+
+    def com_lote(self, lote):
+        calendar = extend_calendar(self.calendar, lote["order_date"])
+        cube, lote_cube = add_to_cube(self.cube, lote, calendar)
+        range_index = self.range_index.extended(lote_cube) or SalesRangeIndex(cube)
+        modelo = self.modelo.copia().partial_fit(lote)
+        flavors = add_to_flavors(self.flavors, lote)
+        return Vendas(calendar, cube, range_index, modelo, flavors)
+
+
+class Ingestor():
+    def __init__(self, pasta, calendar, cube, range_index, modelo, flavors):
+        self.pasta = PastaDePedidos(pasta)
+        self.vendas = Vendas(calendar, SalesCube(cube_segments(cube)), range_index, modelo, flavors)
+        self.lotes = []
+        self.erros = []
+        self.lock = threading.Lock()
+
+    def atualizar(self):
+        with self.lock:
+            novas_linhas = 0
+            for caminho, nome in self.pasta.novos_arquivos():
+                self.pasta.vistos.add(nome)
+                try:
+                    lote = ler_lote(caminho)
+                except (ValueError, OSError) as erro:
+                    self.erros.append(str(erro))
+                    continue
+                self.aplicar(lote)
+                novas_linhas += len(lote)
+            return novas_linhas
+
+    def aplicar(self, lote):
+        if len(lote) == 0:
+            return
+        self.vendas = self.vendas.com_lote(lote)
+        self.lotes.append(len(lote))
+        threading.Thread(target=self.vendas.modelo.completar_tabela, name="tabela", daemon=True).start()
@@ -1,434 +1,252 @@
+import os
 import streamlit as st
-import pandas as pd
-from pizza_gen import pizza_plot
-import plotly.graph_objects as go
-from plotly.colors import sample_colorscale
-import re
-def translate_weekday(day):
-    match day:
-        case "Monday":
-            return "Segunda"
-        case "Tuesday":
-            return "Terca"
-        case "Wednesday":
-            return "Quarta"
-        case "Thursday":
-            return "Quinta"
-        case "Friday":
-            return "Sexta"
-        case "Saturday":
-            return "Sabado"
-        case "Sunday":
-            return "Domingo"
-        case _:
-            return day
-
-def translate_month(month_name):
-    match month_name:
-        case 'January':
-            return 'Jan'
-        case 'February':
-            return 'Fev'
-        case 'March':
-            return 'Mar'
-        case 'April':
-            return 'Abr'
-        case 'May':
-            return 'Mai'
-        case 'June':
-            return 'Jun'
-        case 'July':
-            return 'Jul'
-        case 'August':
-            return 'Ago'
-        case 'September':
-            return 'Set'
-        case 'October':
-            return 'Out'
-        case 'November':
-            return 'Nov'
-        case 'December':
-            return 'Dez'
-        case _:
-            return month_name
-
-def format_label(row_tuple):
-    row = row_tuple[1]
-    month = translate_month(row['order_date'].month_name())
-    day = row['order_date'].day
-    weekday = translate_weekday(row['order_date'].day_name())
-
-    return f"{day} de {month},\n{weekday}"
-
-
-class ModeloCoocorrencia():
-    def __init__(self, df):
-        coocorrencias = dict()
-        qtd_total = dict()
-        preco_total = dict()
-        for i, row in df.iterrows():
-            ingredientes = row['pizza_ingredients'].split(", ")
-            qtd = row['quantity']
-            preco = row['total_price']
-            peso = preco/(qtd*len(ingredientes))
-            for ingrediente in ingredientes:
-                qtd_total[ingrediente] = qtd_total.get(ingrediente, 0) + qtd
-                preco_total[ingrediente] = preco_total.get(ingrediente, 0) + preco
-                if coocorrencias.get(ingrediente, None) is None:
-                    coocorrencias[ingrediente] = dict()
-                hist = coocorrencias[ingrediente]
-                for ingrediente_target in ingredientes:
-                    hist[ingrediente_target] = hist.get(ingrediente_target, 0) + peso
-        for ingrediente in coocorrencias.keys():
-            hist = coocorrencias[ingrediente]
-            fator_norm = hist[ingrediente]
-            for ingrediente_target in hist.keys():
-                hist[ingrediente_target] /= fator_norm
-
-        self.coocorrencias = coocorrencias
-        self.qtd_total = qtd_total
-        self.preco_total = preco_total
-    
-    def top_k_sugestoes(self, k, ingredientes_selecionados):
-        acumulado = dict()
-        for ingrediente in ingredientes_selecionados:
-            hist = self.coocorrencias[ingrediente]
-            for ing_target, value in hist.items():
-                acumulado[ing_target] = acumulado.get(ing_target, 0) + value
-        for ingrediente in ingredientes_selecionados: acumulado.pop(ingrediente)
-        return sorted(acumulado.keys(), key=lambda key : acumulado[key], reverse=True)[:k]
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+import perf
+import warmup
 
+DATASET_PATH = "pizza_dataset.xlsx"
 
-pizza_scaled_plot = lambda labels, values, extended_ratio=1.5 : (
-    pizza_plot(labels, values, extended_ratio=extended_ratio,
-        base_scale=st.session_state["pizza_scale"]
-    )
-)
+def perf_da_sessao():
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    return st.session_state.get("perf", perf.ENABLED)
 
-@st.cache_data
-def load_data(path="pizza_dataset.xlsx"):
-    df = pd.read_excel(path)
-    df['order_weekday'] = (df["order_date"].dt.day_name()
-        .apply(translate_weekday)
-    )
-    df["pretty_date"] = list(map(format_label, df.iterrows()))
-    return df
+perf.session_enabled = perf_da_sessao
+perf.begin_rerun()
 
-df = load_data()
-weekdays_base = df[['order_date', 'order_weekday', 'quantity']].copy()
-hour_base = df[['order_time', 'quantity']].copy()
-hour_base['order_time'] = hour_base['order_time'].apply(lambda val: val.hour)
+st.set_page_config(layout="wide")
 
-@st.cache_resource
-def load_modelo(df):
-    return ModeloCoocorrencia(df)
+st.title("Dashboard da pizza")
 
-modelo_cooc = load_modelo(df)
+tab1, tab2, tab3 = st.tabs(["Movimentação", "Popularidade", "Gerador de Pizza"],
+    key="aba", on_change="rerun")
 
-st.set_page_config(layout="wide")
+with st.sidebar:
+    st.title("Configurações")
+    st.slider("Escala de tamanho da pizza", 0.05, 1.5, warmup.DEFAULT_PIZZA_SCALE, 0.01,
+        format="%.2f", key="pizza_scale")
+    st.radio("Formato da pizza", ["PNG", "SVG"], horizontal=True, key="pizza_format")
+    st.checkbox("Slider para N-destaques?", key="day_slider")
 
-st.title("Dashboard da pizza")
+perf.mark_once("first_paint")
 
-tab1, tab2, tab3 = st.tabs(["Movimentação", "Popularidade", "Gerador de Pizza"])
+from pizza_gen import pizza_plot_png, pizza_plot_svg, render_cache, image_cache_info
+from pizza_data import SalesRangeIndex
+from streaming import load_sales
+from ingestao import Ingestor
+from views import weekday_view, days_topN_view, days_botN_view, peak_hour_view, flavors_view
+from charts import (weekday_figure, days_figures, peak_hour_figure, range_figures,
+    flavors_figures, ingredients_figures)
 
-def weekday_view(month_indexes, weekday_df = weekdays_base):
-    weekdays = (weekday_df[weekday_df['order_date'].dt.month
-        .isin(month_indexes)]
-        .groupby("order_weekday")
-        .sum(True)
-        .sort_values('quantity', ascending=False)
-    )
-    return weekdays
-
-def days_topN_view(month_indexes, N, weekday_df = weekdays_base):
-    weekdays = (weekday_df[weekday_df['order_date'].dt.month
-        .isin(month_indexes)]
-        .groupby('order_date', as_index=False)
-        .sum(True)
-        .sort_values('quantity', ascending=False)
-        .head(N)
-    )
-    weekdays["order_date"] = list(map(format_label, weekdays.iterrows()))
-    return weekdays
-def days_botN_view(month_indexes, N, weekday_df = weekdays_base):
-    weekdays = (weekday_df[weekday_df['order_date'].dt.month
-        .isin(month_indexes)]
-        .groupby('order_date', as_index=False)
-        .sum(True)
-        .sort_values('quantity', ascending=True)
-        .head(N)
-    )
-    weekdays["order_date"] = list(map(format_label, weekdays.iterrows()))
-    return weekdays
-
-def peak_hour_view(month_indexes, grouping = 1, hour_df = hour_base):
-    peak_hour_data = hour_base.groupby('order_time', as_index=False).sum()
-    total_days = len(df['order_date'].unique())
-    peak_hour_data['quantity'] = peak_hour_data['quantity'].apply(lambda val : val/total_days)
-    labels = peak_hour_data['order_time'].to_list()
-    values = peak_hour_data['quantity'].to_list()
-    bin2_labels = []
-    bin2_values = []
-    for i in range(0, 14, 2):
-        bin2_labels.append(f"{labels[i]}~{labels[i+1]}")
-        bin2_values.append(int(((values[i]+values[i+1])/2)*1000)/1000)
-    return labels, values, bin2_labels, bin2_values
-
-@st.cache_data
-def flavors_base():
-    flavors_sales = (df[['pizza_name', 'quantity',]]
-        .groupby('pizza_name',as_index=False)
-        .sum()
-        .sort_values('quantity')
-    )
-    return flavors_sales
-
-@st.cache_data
-def flavors_ingredients_base():
-    flavors_sales = (df[['pizza_name', 'pizza_ingredients', 'quantity',]]
-        .groupby(['pizza_name', 'pizza_ingredients'],as_index=False)
-        .sum()
-        .sort_values('quantity')
+pizza_scaled_plot = lambda labels, values, extended_ratio=1.5 : (
+    (pizza_plot_svg if st.session_state["pizza_format"] == "SVG" else pizza_plot_png)(
+        labels, values, extended_ratio=extended_ratio, base_scale=st.session_state["pizza_scale"]
     )
-    return flavors_sales
-
-flavors_df = flavors_base()
-flavors_ingredients_df = flavors_ingredients_base()
-
-def extract_ingredient_features(dataframe):
-    res = dict()
-    for i, row in dataframe.iterrows():
-        for ingredient in row['pizza_ingredients'].split(", "):
-            res[ingredient] = res.get(ingredient, 0) + 1
-    feature_labels = []
-    feature_values = []
-    for tup in sorted(res.items(), key=lambda tup : tup[1]):
-        feature_labels.append(tup[0])
-        feature_values.append(tup[1])
-    return feature_labels, feature_values
-
-ingredients_list_full = extract_ingredient_features(flavors_ingredients_df)[0]
-
-def flavors_view(N, _Ningr, ingredient_filter_list, flavors_base = flavors_ingredients_df):
-    if len(ingredient_filter_list) > 0:
-        pizza_sales = (flavors_base[
-            ~flavors_base['pizza_ingredients'].str
-                .contains("|".join(map(re.escape, ingredient_filter_list)))
-            ]
-        )
-    else:
-        pizza_sales = flavors_base
+)
 
-    topN = pizza_sales.tail(N)
-    botN = pizza_sales.head(N)
+@st.cache_resource
+def load_ingestor(path=DATASET_PATH, orders_dir=os.environ.get("PIZZA_ORDERS_DIR", "pedidos")):
+    calendar, cube, flavors, modelo = load_sales(path)
+    return Ingestor(orders_dir, calendar, cube, SalesRangeIndex(cube), modelo, flavors)
 
-    top_feature_labels, top_feature_values = extract_ingredient_features(pizza_sales)
-    Ningr = min(_Ningr, len(top_feature_labels))
-    return topN, botN, (top_feature_labels[-Ningr:], top_feature_values[-Ningr:]), (top_feature_labels[:Ningr], top_feature_values[:Ningr])
+@st.cache_resource
+def start_warmup(_ingestor):
+    return warmup.start_background(_ingestor)
+
+ingestor = load_ingestor()
+ingestor.atualizar()
+
+def ingredients_list_full(ingredient_index):
+    return ingredient_index.features(ingredient_index.excluding([]))[0]
+
+months = [
+        "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", "Julho",
+        "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"
+]
+
+sales_range = ingestor.vendas.range_index
+defaults = {
+    "selected_months": months,
+    "N": 5,
+    "Npizzas": 5,
+    "Nsabores": 10,
+    "filtros_ingredientes": [],
+    "ingredientes_selecionados": [],
+    "k_sugestoes": 10,
+    "hour_window": (0, 24),
+    "date_range": (sales_range.first_date.date(), sales_range.last_date.date()),
+}
+for key, value in defaults.items():
+    if key not in st.session_state:
+        st.session_state[key] = value
+    else:
+        st.session_state[key] = st.session_state[key]
 
+def number_widget(label, min_value, max_value, key):
+    if st.session_state["day_slider"]:
+        st.slider(label, min_value, max_value, step=1, key=key)
+    else:
+        st.number_input(label, min_value, max_value, step=1, key=key)
 
+@st.fragment
+@perf.timed()
+def weekday_block(month_indexes):
+    weekday_df = weekday_view(month_indexes, ingestor.vendas.cube)
+    col1, col2 = st.columns([2,1])
+    with col1:
+        st.plotly_chart(weekday_figure(weekday_df))
+    with col2:
+        st.image(pizza_scaled_plot(weekday_df.index, weekday_df['quantity']))
 
-with st.sidebar:
-    st.title("Configurações")
-    st.slider("Escala de tamanho da pizza", 0.05, 1.5, 0.5, 0.01, format="%.2f", key="pizza_scale")
-    st.checkbox("Slider para N-destaques?", key="day_slider")
+@st.fragment
+@perf.timed()
+def days_block(month_indexes):
+    col1, col2, col3 = st.columns([5,1,5])
+    with col2:
+        number_widget("Número de dias", 1, 100, "N")
+    N = st.session_state["N"]
+    vendas = ingestor.vendas
+    top_days_df = days_topN_view(month_indexes, N, vendas.cube, vendas.calendar)
+    bot_days_df = days_botN_view(month_indexes, N, vendas.cube, vendas.calendar)
+    top_fig, bot_fig = days_figures(top_days_df, bot_days_df, N)
+    with col1:
+        st.plotly_chart(top_fig)
+    with col3:
+        st.plotly_chart(bot_fig)
+
+@st.fragment
+@perf.timed()
+def peak_hour_block(month_indexes):
+    peak_hour_tuples = peak_hour_view(month_indexes, ingestor.vendas.cube)
+    col1, col2 = st.columns([2,1])
+    with col1:
+        st.plotly_chart(peak_hour_figure(peak_hour_tuples))
+    with col2:
+        st.image(pizza_scaled_plot(peak_hour_tuples[2], peak_hour_tuples[3]))
 
-with tab1:
-    months = [
-            "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", "Julho",
-            "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"
-    ]
-    if "selected_months" not in st.session_state:
-            st.session_state["selected_months"] = months
-    st.multiselect("Meses", months, key="selected_months")
+@st.fragment
+@perf.timed()
+def range_block():
+    range_index = ingestor.vendas.range_index
 
-    with st.container():
+    col1, col2 = st.columns(2)
+    with col1:
+        st.date_input("Período", min_value=range_index.first_date.date(),
+            max_value=range_index.last_date.date(), key="date_range")
+    with col2:
+        st.slider("Horário", 0, 24, step=1, key="hour_window")
 
-        month_indexes = [
-            months.index(m) + 1 for m in st.session_state["selected_months"]
-        ]
+    if len(st.session_state["date_range"]) == 2:
+        start, end = st.session_state["date_range"]
+        hours = st.session_state["hour_window"]
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Pizzas vendidas", f"{range_index.total(start, end, hours):.0f}")
+        col2.metric("Faturamento", f"{range_index.total(start, end, hours, 'total_price'):.2f}")
+        col3.metric("Dias com pedidos", range_index.n_days(start, end))
 
-        weekday_df = weekday_view(month_indexes)
-
-        label_len = len(weekday_df.index)
-        colors = sample_colorscale('Plasma', [i/(label_len-1) for i in range(label_len)])
-        fig = go.Figure(
-            data = [
-                go.Bar(x=weekday_df.index, y=weekday_df['quantity'], marker_color=colors),
-                go.Scatter(x=weekday_df.index,
-                    y=[weekday_df['quantity'].mean()]*label_len,
-                    mode="lines", line=dict(color="white", dash="dash"),
-                    name=f"Média: {weekday_df['quantity'].mean()}"
-                ),
-            ],
-            layout=dict(
-                title="Movimento por dias da semana"
-            )
+        weekday_fig, daily_fig = range_figures(
+            range_index.weekday_totals(start, end, hours),
+            range_index.daily_totals(start, end, hours),
+            hours
         )
-        col1, col2 = st.columns([2,1])
+        col1, col2 = st.columns([1,2])
         with col1:
-            st.plotly_chart(fig)
+            st.plotly_chart(weekday_fig)
         with col2:
-            st.image(pizza_scaled_plot(weekday_df.index, weekday_df['quantity']))
-        
-    st.divider()
+            st.plotly_chart(daily_fig)
 
-    with st.container():
-        if "N" not in st.session_state:
-            st.session_state["N"] = 5
-
-        top5_days_df = days_topN_view(month_indexes, st.session_state["N"])
-        bot5_days_df = days_botN_view(month_indexes, st.session_state["N"])
-        col1, col2, col3 = st.columns([5,1,5])
-        
-        label_len = len(top5_days_df.index)
-        colors = sample_colorscale('Plasma', [i/(label_len-1) for i in range(label_len)])
-        with col1:
-            fig = go.Figure(
-                data = [
-                    go.Bar(x=top5_days_df['order_date'], y=top5_days_df['quantity'], marker_color=colors),
-                ],
-                layout=dict(
-                    title=f"Top {st.session_state["N"]} dias mais movimentados"
-                )
-            )
+@st.fragment
+@perf.timed()
+def flavors_block():
+    vendas = ingestor.vendas
+    col1,col2,col3 = st.columns([7,1,1])
+    with col1:
+        st.multiselect("Ingredientes filtrados", ingredients_list_full(vendas.ingredient_index), key="filtros_ingredientes")
+    with col2:
+        number_widget("Número de sabores", 1, 100, "Npizzas")
+    with col3:
+        number_widget("Número de ingredientes", 1, 100, "Nsabores")
+
+    topN, botN, top_features, bot_features = flavors_view(
+        st.session_state["Npizzas"], st.session_state["Nsabores"],
+        st.session_state["filtros_ingredientes"], vendas.flavors, vendas.ingredient_index
+    )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        for fig in flavors_figures(topN, botN, st.session_state["Npizzas"]):
             st.plotly_chart(fig)
-        with col3:
-            fig = go.Figure(
-                data = [
-                    go.Bar(x=bot5_days_df['order_date'], y=bot5_days_df['quantity'], marker_color=colors),
-                ],
-                layout=dict(
-                    title=f"Bottom {st.session_state["N"]} dias mais movimentados"
-                )
-            )
+    with col2:
+        for fig in ingredients_figures(top_features, bot_features, st.session_state["Nsabores"]):
             st.plotly_chart(fig)
-        with col2:
-            if st.session_state["day_slider"]:
-                st.slider("Número de dias", 1, 100, step=1, key="N", value=st.session_state["N"])
-            else:
-                st.number_input("Número de dias", 1, 100, step=1, key="N", value=st.session_state["N"])
 
-    st.divider()
+@st.fragment
+@perf.timed()
+def suggestions_block():
+    vendas = ingestor.vendas
+    bcol1, bcol2 = st.columns([5,1])
+    with bcol1:
+        st.multiselect("Ingredientes filtrados", ingredients_list_full(vendas.ingredient_index), key="ingredientes_selecionados")
+    with bcol2:
+        number_widget("Número de sugestões", 1, 30, "k_sugestoes")
 
     with st.container():
-        peak_hour_tuples = peak_hour_view(month_indexes)
-
-        label_len = len(peak_hour_tuples[0])
-        colors = sample_colorscale('Plasma', [i/(label_len-1) for i in range(label_len)])
-        fig = go.Figure(
-            data = [
-                go.Bar(x=peak_hour_tuples[0], y=peak_hour_tuples[1], marker_color=colors),
-            ],
-            layout=dict(
-                title="Pedidos de pizza por horário"
-            )
-        )
-        col1, col2 = st.columns([2,1])
-        with col1:
-            st.plotly_chart(fig)
-        with col2:
-            st.image(pizza_scaled_plot(peak_hour_tuples[2], peak_hour_tuples[3]))
+        display_text = vendas.modelo.top_k_sugestoes(st.session_state["k_sugestoes"], st.session_state["ingredientes_selecionados"])
+        st.text("Ingredientes sugeridos:")
+        if len(display_text)>0:
+            st.markdown("- "+ "\n- ".join(display_text))
 
-with tab2:
+with st.sidebar:
+    if len(ingestor.lotes) > 0:
+        st.caption(f"Lotes de pedidos novos: {len(ingestor.lotes)} ({sum(ingestor.lotes)} linhas)")
+    for erro in ingestor.erros:
+        st.warning(erro)
+    st.checkbox("Perf", value=perf.ENABLED, key="perf")
+    perf_panel = st.empty()
+
+if tab1.open:
+    with tab1:
+        st.multiselect("Meses", months, key="selected_months")
+        month_indexes = [
+            months.index(m) + 1 for m in st.session_state["selected_months"]
+        ]
 
-    
-    if "Npizzas" not in st.session_state:
-            st.session_state["Npizzas"] = 5
-    if "Nsabores" not in st.session_state:
-            st.session_state["Nsabores"] = 10
-    if "filtros_ingredientes" not in st.session_state:
-            st.session_state["filtros_ingredientes"] = []
+        with st.container():
+            weekday_block(month_indexes)
 
-    col1,col2,col3 = st.columns([7,1,1])
-    with col1:
-        st.multiselect("Ingredientes filtrados", ingredients_list_full, key="filtros_ingredientes")
+        st.divider()
 
-    if st.session_state["day_slider"]:
-        with col2:
-            st.slider("Número de sabores", 1, 100, step=1, key="Npizzas", value=st.session_state["Npizzas"])
-        with col3:
-            st.slider("Número de ingredientes", 1, 100, step=1, key="Nsabores", value=st.session_state["Nsabores"])
-    else:
-        with col2:
-            st.number_input("Número de sabores", 1, 100, step=1, key="Npizzas", value=st.session_state["Npizzas"])
-        with col3:
-            st.number_input("Número de ingredientes", 1, 100, step=1, key="Nsabores", value=st.session_state["Nsabores"])
+        with st.container():
+            days_block(month_indexes)
 
-    
-    topN, botN, top_features, bot_features = flavors_view(st.session_state["Npizzas"], st.session_state["Nsabores"], st.session_state["filtros_ingredientes"])
+        st.divider()
 
-    col1, col2 = st.columns(2)
-    with col1:
-        label_len = len(topN.index)
-        colors = sample_colorscale('Plasma', [i/(label_len-1) for i in range(label_len)])
-        fig = go.Figure(
-            data = [
-                go.Bar(x=topN['pizza_name'], y=topN['quantity'], marker_color=colors),
-            ],
-            layout=dict(
-                title=f"Top {st.session_state["Npizzas"]} sabores"
-            )
-        )
-        st.plotly_chart(fig)
-        fig = go.Figure(
-            data = [
-                go.Bar(x=botN['pizza_name'], y=botN['quantity'], marker_color=colors),
-            ],
-            layout=dict(
-                title=f"Bot {st.session_state["Npizzas"]} sabores"
-            )
-        )
-        st.plotly_chart(fig)
+        with st.container():
+            peak_hour_block(month_indexes)
 
-    with col2:
-        label_len = len(top_features[0])
-        colors = sample_colorscale('Plasma', [i/(label_len-1) for i in range(label_len)])
-        fig = go.Figure(
-            data = [
-                go.Bar(y=top_features[0], x=top_features[1], marker_color=colors, orientation="h"),
-            ],
-            layout=dict(
-                title=f"Top {st.session_state["Nsabores"]} ingredientes"
-            )
-        )
-        st.plotly_chart(fig)
-        fig = go.Figure(
-            data = [
-                go.Bar(y=bot_features[0], x=bot_features[1], marker_color=colors, orientation="h"),
-            ],
-            layout=dict(
-                title=f"Bot {st.session_state["Nsabores"]} ingredientes"
-            )
-        )
-        st.plotly_chart(fig)
+        st.divider()
 
-with tab3:
-    col1,col2 = st.columns(2)
+        with st.container():
+            range_block()
 
-    if "ingredientes_selecionados" not in st.session_state:
-            st.session_state["ingredientes_selecionados"] = []
-    if "k_sugestoes" not in st.session_state:
-            st.session_state["k_sugestoes"] = 10
+    perf.mark_once("first_tab")
 
-    with col1:
-        bcol1, bcol2 = st.columns([5,1])
-        with bcol1:
-            st.multiselect("Ingredientes filtrados", ingredients_list_full, key="ingredientes_selecionados")
-        with bcol2:
-            if st.session_state["day_slider"]:
-                st.slider("Número de sugestões", 1, 30, step=1, key="k_sugestoes", value=st.session_state["k_sugestoes"])
-            else:
-                st.number_input("Número de sugestões", 1, 30, step=1, key="k_sugestoes", value=st.session_state["k_sugestoes"])
-        
-        with st.container():
-            display_text = modelo_cooc.top_k_sugestoes(st.session_state["k_sugestoes"], st.session_state["ingredientes_selecionados"])
-            st.text("Ingredientes sugeridos:")
-            if len(display_text)>0:
-                st.markdown("- "+ "\n- ".join(display_text))
+start_warmup(ingestor)
 
-    with col2:
-        texto = '''### Modelo de coocorrência
+if tab2.open:
+    with tab2:
+        flavors_block()
+
+if tab3.open:
+    with tab3:
+        col1,col2 = st.columns(2)
+
+        with col1:
+            suggestions_block()
+
+        with col2:
+            texto = '''### Modelo de coocorrência
 
 Para esse sistema de recomendação foi montado um modelo de coocorrências, algo como uma matriz de tamanho [Palavras, Ocorrencias de outras palavras].  
 Para a contagem de ocorrências foram aplicados pesos: tanto para dar mais graça quanto para nivelar mais o que tornava o ingrediente de uma pizza sugerido que o outro.  
@@ -436,6 +254,25 @@ A fórmula para o valor de 'ocorrências' que acontecem são: $ \\frac{P}{QN} $,
 Diferentemente das semelhantes matrizes de co-ocorrência de PDI ou modelos de N-gramas em NLP, aqui a coocorrência leva em conta a pizza inteira (nem sequer poderia levar em conta só uma parte, pizzas não são sequenciais!).  
 A amostragem é feita combinando as 'ocorrências' de cada ingrediente (token), normalizadas pelo seu número de ocorrências, e extraindo os top K ingredientes com maior valor.  
         '''
-        with st.container():
-            st.markdown(texto)
-        
\ No newline at end of file
+            with st.container():
+                st.markdown(texto)
+
+record = perf.end_rerun({"render": render_cache.info(), "image": image_cache_info()})
+if record is not None:
+    with perf_panel.container():
+        st.metric("Rerun", f"{record['wall_ms']:.1f} ms")
+        for name, since_start in perf.marks.items():
+            st.caption(f"{name}: {since_start:.0f} ms desde o início do processo")
+        if record["process_peak_kb"] is not None:
+            st.caption(f"Pico de memória do processo: {record['process_peak_kb']:.0f} KiB")
+        st.dataframe(
+            [{"função": name, **stats} for name, stats in record["calls"].items()],
+            hide_index=True
+        )
+        st.json(record["caches"], expanded=False)
+        vendas = ingestor.vendas
+        st.dataframe(perf.memory_report(
+            cube=vendas.cube, calendar=vendas.calendar, range_index=vendas.range_index,
+            flavors=vendas.flavors, ingredient_index=vendas.ingredient_index, modelo=vendas.modelo,
+            render_cache=render_cache,
+        ), hide_index=True)
@@ -0,0 +1,381 @@
+import copy
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from perf import timed
+
+LINHAS_POR_BLOCO = 2**16
+VERSAO_ARTEFATO = 4
+ARRAYS_ARTEFATO = ("chaves", "bruto", "ordem", "qtd_total", "preco_total")
+ARRAYS_NORMALIZADOS = ("matriz",)
+ARRAYS_TABELA = ("tabela_simples", "tabela_chaves", "tabela_pares")
+K_TABELA = 32
+CONSULTAS_POR_BLOCO = 1024
+MEMO_TAMANHO = 1024
+BITS_COLUNA = 32
+
+def chave_celula(linha, coluna):
+    return (np.asarray(linha, dtype=np.int64) << BITS_COLUNA) | coluna
+
+def _gravavel(array):
+    return array if array.flags.writeable else np.array(array)
+
+
+class ModeloCoocorrencia():
+    @timed()
+    def __init__(self, df=None):
+        self.vocabulario = []
+        self.indice = dict()
+        self.chaves = np.zeros(0, dtype=np.int64)
+        self.bruto = np.zeros(0)
+        self.ordem = np.zeros(0, dtype=np.int64)
+        self.qtd_total = np.zeros(0, dtype=np.int64)
+        self.preco_total = np.zeros(0)
+        self.proximo_par = 0
+        self._matriz = None
+        self._linhas = None
+        self._tabela = None
+        self._limpar_consultas()
+        if df is not None:
+            self.partial_fit(df)
+
+    def _crescer(self, V):
+        anterior = len(self.qtd_total)
+        if V == anterior:
+            self.qtd_total, self.preco_total = _gravavel(self.qtd_total), _gravavel(self.preco_total)
+            return
+        qtd_total = np.zeros(V, dtype=np.int64)
+        qtd_total[:anterior] = self.qtd_total
+        preco_total = np.zeros(V)
+        preco_total[:anterior] = self.preco_total
+        self.qtd_total, self.preco_total = qtd_total, preco_total
+
+    def copia(self):
+        modelo = copy.copy(self)
+        modelo.vocabulario = list(self.vocabulario)
+        modelo.indice = dict(self.indice)
+        for nome in ARRAYS_ARTEFATO:
+            setattr(modelo, nome, np.array(getattr(self, nome)))
+        modelo._limpar_consultas()
+        return modelo
+
+    def _incluir_celulas(self, pares_flat):
+        chaves_lote, primeiro = np.unique(pares_flat, return_index=True)
+        posicao = np.searchsorted(self.chaves, chaves_lote)
+        existentes = posicao < len(self.chaves)
+        existentes[existentes] = self.chaves[posicao[existentes]] == chaves_lote[existentes]
+        if existentes.all():
+            self.bruto = _gravavel(self.bruto)
+            return
+        chaves = np.concatenate([self.chaves, chaves_lote[~existentes]])
+        ordenacao = np.argsort(chaves, kind="stable")
+        self.chaves = chaves[ordenacao]
+        self.bruto = np.concatenate([self.bruto, np.zeros((~existentes).sum())])[ordenacao]
+        self.ordem = np.concatenate([self.ordem, self.proximo_par + primeiro[~existentes]])[ordenacao]
+
+    @timed()
+    def partial_fit(self, df):
+        receitas, receita_por_linha = self._receitas(df['pizza_ingredients'])
+        for receita in receitas:
+            for ingrediente in receita:
+                if ingrediente not in self.indice:
+                    self.indice[ingrediente] = len(self.vocabulario)
+                    self.vocabulario.append(ingrediente)
+        self._crescer(len(self.vocabulario))
+        if len(receitas) == 0:
+            return self
+
+        codigos = [np.array([self.indice[ing] for ing in receita], dtype=np.int64) for receita in receitas]
+        tamanhos = np.array([len(c) for c in codigos], dtype=np.int64)
+        pares = [chave_celula(c[:, None], c[None, :]).ravel() for c in codigos]
+        inicio_ingredientes = np.concatenate(([0], np.cumsum(tamanhos)[:-1]))
+        inicio_pares = np.concatenate(([0], np.cumsum(tamanhos**2)[:-1]))
+        ingredientes_flat = np.concatenate(codigos)
+        pares_flat = np.concatenate(pares)
+
+        self._incluir_celulas(pares_flat)
+        self.proximo_par += len(pares_flat)
+        celulas_flat = np.searchsorted(self.chaves, pares_flat)
+
+        qtd = df['quantity'].to_numpy()
+        preco = df['total_price'].to_numpy(dtype=float)
+        for inicio in range(0, len(receita_por_linha), LINHAS_POR_BLOCO):
+            bloco = slice(inicio, inicio + LINHAS_POR_BLOCO)
+            r = receita_por_linha[bloco]
+            peso = preco[bloco] / (qtd[bloco] * tamanhos[r])
+            ing = _expandir(ingredientes_flat, inicio_ingredientes[r], tamanhos[r])
+            np.add.at(self.qtd_total, ing, np.repeat(qtd[bloco], tamanhos[r]))
+            np.add.at(self.preco_total, ing, np.repeat(preco[bloco], tamanhos[r]))
+            celula = _expandir(celulas_flat, inicio_pares[r], tamanhos[r]**2)
+            np.add.at(self.bruto, celula, np.repeat(peso, tamanhos[r]**2))
+
+        self._matriz = None
+        self._linhas = None
+        self._limpar_consultas()
+        if self._tabela is not None:
+            self._atualizar_tabela(np.unique(ingredientes_flat))
+        return self
+
+    def _limpar_consultas(self):
+        self._memo = OrderedDict()
+        self._memo_lock = threading.Lock()
+
+    def _indexar(self):
+        V = len(self.vocabulario)
+        self._colunas = (self.chaves & ((1 << BITS_COLUNA) - 1)).astype(np.int32)
+        self._linhas = np.searchsorted(self.chaves, chave_celula(np.arange(V + 1), 0))
+
+    def _normalizar(self):
+        V = len(self.vocabulario)
+        diagonal = self.bruto[np.searchsorted(self.chaves, chave_celula(np.arange(V), np.arange(V)))]
+        self._matriz = self.bruto / np.repeat(diagonal, np.diff(self.linhas))
+
+    @property
+    def matriz(self):
+        if self._matriz is None:
+            self._normalizar()
+        return self._matriz
+
+    @property
+    def linhas(self):
+        if self._linhas is None:
+            self._indexar()
+        return self._linhas
+
+    @property
+    def colunas(self):
+        if self._linhas is None:
+            self._indexar()
+        return self._colunas
+
+    def _construir_tabela(self):
+        V = len(self.vocabulario)
+        a, b = self.chaves >> BITS_COLUNA, self.colunas.astype(np.int64)
+        fora_da_diagonal = a != b
+        chaves = self.chaves[fora_da_diagonal]
+        simples = self._tabelar([[i] for i in range(V)])
+        pares = self._tabelar([[i, j] for i, j in zip(a[fora_da_diagonal], b[fora_da_diagonal])])
+        self._tabela = (simples, chaves, pares)
+
+    def _atualizar_tabela(self, tocados):
+        simples_antes, chaves, pares = self._tabela
+        simples = np.full((len(self.vocabulario), K_TABELA), -1, dtype=np.int32)
+        simples[:len(simples_antes)] = simples_antes
+        simples[tocados] = self._tabelar([[i] for i in tocados])
+        validas = ~(np.isin(chaves >> BITS_COLUNA, tocados) | np.isin(chaves & ((1 << BITS_COLUNA) - 1), tocados))
+        self._tabela = (simples, chaves[validas], pares[validas])
+
+    def completar_tabela(self):
+        if self._tabela is None:
+            self._construir_tabela()
+            return
+        simples, chaves_antes, pares_antes = self._tabela
+        a, b = self.chaves >> BITS_COLUNA, self.colunas.astype(np.int64)
+        fora_da_diagonal = a != b
+        a, b, chaves = a[fora_da_diagonal], b[fora_da_diagonal], self.chaves[fora_da_diagonal]
+        posicao = np.searchsorted(chaves_antes, chaves)
+        existentes = posicao < len(chaves_antes)
+        existentes[existentes] = chaves_antes[posicao[existentes]] == chaves[existentes]
+        if existentes.all():
+            return
+        pares = np.full((len(chaves), K_TABELA), -1, dtype=np.int32)
+        pares[existentes] = pares_antes[posicao[existentes]]
+        pares[~existentes] = self._tabelar([[i, j] for i, j in zip(a[~existentes], b[~existentes])])
+        self._tabela = (simples, chaves, pares)
+
+    def _tabelar(self, consultas):
+        tabela = np.full((len(consultas), K_TABELA), -1, dtype=np.int32)
+        for inicio in range(0, len(consultas), CONSULTAS_POR_BLOCO):
+            bloco = consultas[inicio:inicio + CONSULTAS_POR_BLOCO]
+            for linha, melhores in enumerate(self._melhores_lote(K_TABELA, bloco), inicio):
+                tabela[linha, :len(melhores)] = melhores
+        return tabela
+
+    @property
+    def tabela(self):
+        if self._tabela is None:
+            self._construir_tabela()
+        return self._tabela
+
+    @property
+    def tabela_simples(self):
+        return self.tabela[0]
+
+    @property
+    def tabela_chaves(self):
+        return self.tabela[1]
+
+    @property
+    def tabela_pares(self):
+        return self.tabela[2]
+
+    def _linha_tabela(self, selecao):
+        simples, chaves, pares = self.tabela
+        if len(selecao) == 1:
+            return simples[selecao[0]]
+        if len(selecao) == 2:
+            chave = chave_celula(selecao[0], selecao[1])
+            posicao = np.searchsorted(chaves, chave)
+            if posicao < len(chaves) and chaves[posicao] == chave:
+                return pares[posicao]
+        return None
+
+    def salvar(self, pasta, impressao):
+        pasta_tmp = f"{pasta}.{os.getpid()}.tmp"
+        shutil.rmtree(pasta_tmp, ignore_errors=True)
+        os.makedirs(pasta_tmp)
+        for nome in ARRAYS_ARTEFATO + ARRAYS_NORMALIZADOS + ARRAYS_TABELA:
+            np.save(os.path.join(pasta_tmp, f"{nome}.npy"), getattr(self, nome))
+        with open(os.path.join(pasta_tmp, "meta.json"), "w") as file:
+            json.dump({
+                "versao": VERSAO_ARTEFATO,
+                "impressao": impressao,
+                "vocabulario": self.vocabulario,
+                "proximo_par": self.proximo_par,
+            }, file)
+        shutil.rmtree(pasta, ignore_errors=True)
+        os.replace(pasta_tmp, pasta)
+
+    @classmethod
+    def carregar(cls, pasta, impressao=None, mmap=True):
+        try:
+            with open(os.path.join(pasta, "meta.json")) as file:
+                meta = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if meta.get("versao") != VERSAO_ARTEFATO:
+            return None
+        if impressao is not None and meta["impressao"] != impressao:
+            return None
+        modelo = cls.__new__(cls)
+        modelo.vocabulario = meta["vocabulario"]
+        modelo.indice = {ingrediente: i for i, ingrediente in enumerate(modelo.vocabulario)}
+        modelo.proximo_par = meta["proximo_par"]
+        for nome in ARRAYS_ARTEFATO:
+            setattr(modelo, nome, np.load(os.path.join(pasta, f"{nome}.npy"),
+                mmap_mode="r" if mmap else None))
+        for nome in ARRAYS_NORMALIZADOS:
+            setattr(modelo, f"_{nome}", np.load(os.path.join(pasta, f"{nome}.npy"),
+                mmap_mode="r" if mmap else None))
+        modelo._linhas = None
+        modelo._limpar_consultas()
+        modelo._tabela = tuple(
+            np.load(os.path.join(pasta, f"{nome}.npy"), mmap_mode="r" if mmap else None)
+            for nome in ARRAYS_TABELA
+        )
+        return modelo
+
+    @staticmethod
+    def _receitas(ingredientes):
+        receita_por_linha, distintas = pd.factorize(ingredientes)
+        return [receita.split(", ") for receita in distintas], receita_por_linha
+
+    @property
+    def coocorrencias(self):
+        coocorrencias = dict()
+        for a, ingrediente in enumerate(self.vocabulario):
+            celulas = np.arange(self.linhas[a], self.linhas[a + 1])
+            celulas = celulas[np.argsort(self.ordem[celulas])]
+            coocorrencias[ingrediente] = {
+                self.vocabulario[b]: self.matriz[c] for c, b in zip(celulas, self.colunas[celulas])
+            }
+        return coocorrencias
+
+    def _celulas(self, linhas):
+        inicios = self.linhas[linhas]
+        tamanhos = self.linhas[linhas + 1] - inicios
+        return _intervalos(inicios, tamanhos), tamanhos
+
+    def _acumular(self, selecao):
+        acumulado = np.zeros(len(self.vocabulario))
+        presente = np.zeros(len(self.vocabulario), dtype=bool)
+        primeira_selecao = np.full(len(self.vocabulario), len(selecao))
+        ordem = np.zeros(len(self.vocabulario), dtype=np.int64)
+        for j, i in enumerate(selecao):
+            celulas = slice(self.linhas[i], self.linhas[i + 1])
+            colunas = self.colunas[celulas]
+            acumulado[colunas] += self.matriz[celulas]
+            novos = ~presente[colunas]
+            primeira_selecao[colunas[novos]] = j
+            ordem[colunas[novos]] = self.ordem[celulas][novos]
+            presente[colunas] = True
+        presente[selecao] = False
+        return acumulado, presente, primeira_selecao, ordem
+
+    @staticmethod
+    def _ranking(k, acumulado, presente, primeira_selecao, ordem):
+        candidatos = np.flatnonzero(presente)
+        valores = acumulado[candidatos]
+        if k < len(candidatos):
+            corte = np.partition(-valores, k - 1)[k - 1]
+            manter = -valores <= corte
+            candidatos, valores = candidatos[manter], valores[manter]
+        posicao = np.lexsort((ordem[candidatos], primeira_selecao[candidatos], -valores))
+        return candidatos[posicao[:k]]
+
+    @timed()
+    def top_k_sugestoes(self, k, ingredientes_selecionados):
+        selecao = [self.indice[ingrediente] for ingrediente in ingredientes_selecionados]
+        if len(selecao) == 0 or k <= 0:
+            return []
+        if k <= K_TABELA:
+            linha = self._linha_tabela(selecao)
+            if linha is not None:
+                return [self.vocabulario[i] for i in linha[:k].tolist() if i >= 0]
+        chave = (k, tuple(selecao))
+        with self._memo_lock:
+            if chave in self._memo:
+                self._memo.move_to_end(chave)
+                return list(self._memo[chave])
+        melhores = [self.vocabulario[i] for i in self._ranking(k, *self._acumular(selecao))]
+        with self._memo_lock:
+            self._memo[chave] = melhores
+            while len(self._memo) > MEMO_TAMANHO:
+                self._memo.popitem(last=False)
+        return list(melhores)
+
+    @timed()
+    def top_k_sugestoes_lote(self, k, selecoes):
+        indices = [[self.indice[ingrediente] for ingrediente in selecao] for selecao in selecoes]
+        return [[self.vocabulario[i] for i in melhores] for melhores in self._melhores_lote(k, indices)]
+
+    def _melhores_lote(self, k, indices):
+        if k <= 0:
+            return [[] for _ in indices]
+        V = len(self.vocabulario)
+        Q = len(indices)
+        tamanho = max((len(selecao) for selecao in indices), default=0)
+        acumulado = np.zeros((Q, V))
+        presente = np.zeros((Q, V), dtype=bool)
+        primeira_selecao = np.full((Q, V), tamanho)
+        ordem = np.zeros((Q, V), dtype=np.int64)
+        for j in range(tamanho):
+            consultas = np.array([q for q, selecao in enumerate(indices) if len(selecao) > j], dtype=np.int64)
+            alvos = np.array([indices[q][j] for q in consultas], dtype=np.int64)
+            celulas, tamanhos = self._celulas(alvos)
+            q, colunas = np.repeat(consultas, tamanhos), self.colunas[celulas]
+            acumulado[q, colunas] += self.matriz[celulas]
+            novos = ~presente[q, colunas]
+            primeira_selecao[q[novos], colunas[novos]] = j
+            ordem[q[novos], colunas[novos]] = self.ordem[celulas[novos]]
+            presente[q, colunas] = True
+        resultados = []
+        for q, selecao in enumerate(indices):
+            if len(selecao) == 0:
+                resultados.append([])
+                continue
+            presente[q, selecao] = False
+            resultados.append(self._ranking(k, acumulado[q], presente[q], primeira_selecao[q], ordem[q]))
+        return resultados
+
+
+def _intervalos(inicios, tamanhos):
+    deslocamento = np.repeat(inicios - (np.cumsum(tamanhos) - tamanhos), tamanhos)
+    return np.arange(tamanhos.sum()) + deslocamento
+
+def _expandir(valores, inicios, tamanhos):
+    return valores[_intervalos(inicios, tamanhos)]
@@ -0,0 +1,186 @@
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+
+ENABLED = os.environ.get("PIZZA_PERF", "0") == "1"
+TRACE_PATH = os.environ.get("PIZZA_PERF_TRACE", "perf_trace.jsonl")
+
+def _process_start():
+    try:
+        with open("/proc/self/stat") as file:
+            start_ticks = int(file.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/stat") as file:
+            boot_time = next(int(line.split()[1]) for line in file if line.startswith("btime"))
+        return boot_time + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration):
+        return time.time()
+
+PROCESS_START = _process_start()
+
+if ENABLED:
+    tracemalloc.start()
+
+_local = threading.local()
+session_enabled = None
+_trace_lock = threading.Lock()
+_last_counters = dict()
+last_records = []
+marks = dict()
+
+
+class Recorder():
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+        self.calls = dict()
+        self.start = time.perf_counter()
+
+    def add(self, name, elapsed):
+        stats = self.calls.setdefault(name, [0, 0., 0.])
+        stats[0] += 1
+        stats[1] += elapsed
+        stats[2] = max(stats[2], elapsed)
+
+    def record(self, counters=None):
+        record = {
+            "ts": time.time(),
+            "kind": self.kind,
+            "name": self.name,
+            "wall_ms": (time.perf_counter() - self.start) * 1000,
+            "process_peak_kb": tracemalloc.get_traced_memory()[1] / 1024 if tracemalloc.is_tracing() else None,
+            "calls": {
+                name: {"n": n, "total_ms": total * 1000, "max_ms": longest * 1000}
+                for name, (n, total, longest) in sorted(self.calls.items(), key=lambda item: -item[1][1])
+            },
+        }
+        if counters:
+            record["caches"] = {name: _counter_delta(name, values) for name, values in counters.items()}
+        return record
+
+
+def _counter_delta(name, values):
+    previous = _last_counters.get(name, dict())
+    _last_counters[name] = dict(values)
+    return {
+        key: value - previous.get(key, 0) if key in ("hits", "misses", "disk_hits", "evictions") else value
+        for key, value in values.items()
+    }
+
+
+def _write(record):
+    last_records.append(record)
+    del last_records[:-50]
+    if TRACE_PATH:
+        with _trace_lock, open(TRACE_PATH, "a") as file:
+            file.write(json.dumps(record) + "\n")
+
+
+def current():
+    return getattr(_local, "recorder", None)
+
+
+def enabled():
+    sessao = session_enabled() if session_enabled is not None else None
+    return ENABLED if sessao is None else sessao
+
+
+def begin_rerun(name="main"):
+    _local.recorder = Recorder("rerun", name) if enabled() else None
+
+
+def end_rerun(counters=None):
+    recorder = current()
+    _local.recorder = None
+    if recorder is None:
+        return None
+    record = recorder.record(counters)
+    _write(record)
+    return record
+
+
+def mark_once(name):
+    if name in marks:
+        return None
+    marks[name] = (time.time() - PROCESS_START) * 1000
+    if ENABLED:
+        _write({"ts": time.time(), "kind": "mark", "name": name, "since_start_ms": marks[name]})
+    return marks[name]
+
+
+def timed(name=None):
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled():
+                return func(*args, **kwargs)
+            recorder = current()
+            root = recorder is None
+            if root:
+                recorder = _local.recorder = Recorder("call", label)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                recorder.add(label, time.perf_counter() - start)
+                if root:
+                    _local.recorder = None
+                    _write(recorder.record())
+        return wrapper
+    return decorator
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _nbytes(obj, seen):
+    import numpy as np
+    import pandas as pd
+    if id(obj) in seen:
+        return 0, 0
+    seen.add(id(obj))
+    if isinstance(obj, np.memmap):
+        return 0, obj.nbytes
+    if isinstance(obj, np.ndarray):
+        if obj.base is not None:
+            return _nbytes(obj.base, seen)
+        return obj.nbytes, 0
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(obj, pd.DataFrame) else usage), 0
+    if isinstance(obj, dict):
+        items = list(obj.keys()) + list(obj.values())
+    elif isinstance(obj, (list, tuple, set)):
+        items = list(obj)
+    elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+        items = list(vars(obj).values())
+    else:
+        return sys.getsizeof(obj), 0
+    owned, mapped = sys.getsizeof(obj), 0
+    for item in items:
+        item_owned, item_mapped = _nbytes(item, seen)
+        owned += item_owned
+        mapped += item_mapped
+    return owned, mapped
+
+
+def memory_report(**objects):
+    seen = set()
+    rows = []
+    for name, obj in objects.items():
+        owned, mapped = _nbytes(obj, seen)
+        rows.append({"object": name, "mb": owned / 2**20, "mapped_mb": mapped / 2**20})
+    rows.sort(key=lambda row: -row["mb"])
+    rows.append({"object": "rss", "mb": rss_mb(), "mapped_mb": None})
+    return rows
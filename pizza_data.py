@@ -0,0 +1,331 @@
+import copy
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from snapshot import load_snapshot, save_snapshot
+from perf import timed
+
+WEEKDAYS_PT = {
+    "Monday": "Segunda",
+    "Tuesday": "Terca",
+    "Wednesday": "Quarta",
+    "Thursday": "Quinta",
+    "Friday": "Sexta",
+    "Saturday": "Sabado",
+    "Sunday": "Domingo",
+}
+
+MONTHS_PT = {
+    'January': 'Jan',
+    'February': 'Fev',
+    'March': 'Mar',
+    'April': 'Abr',
+    'May': 'Mai',
+    'June': 'Jun',
+    'July': 'Jul',
+    'August': 'Ago',
+    'September': 'Set',
+    'October': 'Out',
+    'November': 'Nov',
+    'December': 'Dez',
+}
+
+def build_calendar(order_dates):
+    dates = pd.DatetimeIndex(pd.unique(pd.Series(order_dates).dt.normalize())).sort_values()
+    weekday = pd.Categorical(dates.day_name().map(WEEKDAYS_PT),
+        categories=list(WEEKDAYS_PT.values()))
+    month = pd.Categorical(dates.month_name().map(MONTHS_PT),
+        categories=list(MONTHS_PT.values()))
+    pretty_date = (dates.day.astype(str) + " de " + month.astype(str) + ",\n"
+        + weekday.astype(str))
+    return pd.DataFrame({
+        "weekday": weekday,
+        "month": month,
+        "pretty_date": pd.Categorical(pretty_date),
+    }, index=dates.rename("order_date"))
+
+def calendar_lookup(calendar, order_dates, column):
+    positions = calendar.index.get_indexer(pd.Series(order_dates).dt.normalize())
+    return calendar[column].to_numpy(dtype=object)[positions]
+
+def compact_frame(df):
+    for column in df.columns:
+        if df[column].dtype == object:
+            df[column] = pd.Categorical(df[column])
+        elif pd.api.types.is_integer_dtype(df[column].dtype):
+            df[column] = pd.to_numeric(df[column], downcast="integer")
+    return df
+
+@timed()
+def load_data(path="pizza_dataset.xlsx"):
+    df = load_snapshot(path)
+    if df is not None:
+        return df
+    df = pd.read_excel(path)
+    calendar = build_calendar(df["order_date"])
+    df['order_weekday'] = calendar_lookup(calendar, df["order_date"], "weekday")
+    df["pretty_date"] = calendar_lookup(calendar, df["order_date"], "pretty_date")
+    df = compact_frame(df)
+    try:
+        save_snapshot(df, path)
+    except OSError:
+        pass
+    return df
+
+def build_flavors(df):
+    flavors_sales = (df[['pizza_name', 'pizza_ingredients', 'quantity',]]
+        .astype({'quantity': 'int64'})
+        .groupby(['pizza_name', 'pizza_ingredients'], as_index=False, observed=True)
+        .sum()
+        .sort_values('quantity')
+    )
+    return flavors_sales
+
+def add_to_flavors(flavors, batch):
+    return build_flavors(pd.concat([flavors, batch[['pizza_name', 'pizza_ingredients', 'quantity']]]))
+
+def order_hours(order_time):
+    codes, uniques = pd.factorize(order_time)
+    return np.array([value.hour for value in uniques])[codes]
+
+def build_sales_cube(df, calendar, like=None):
+    cube = (pd.DataFrame({
+            "order_date": df["order_date"].dt.normalize(),
+            "order_hour": order_hours(df["order_time"]),
+            "pizza_name": df["pizza_name"],
+            "quantity": df["quantity"].astype("int64"),
+            "total_price": df["total_price"],
+        })
+        .groupby(["order_date", "order_hour", "pizza_name"], as_index=False, observed=True)
+        .sum()
+    )
+    cube["order_weekday"] = calendar_lookup(calendar, cube["order_date"], "weekday")
+    cube["month"] = cube["order_date"].dt.month
+    cube = compact_frame(cube)
+    if like is not None:
+        for column in like.columns:
+            if isinstance(like[column].dtype, pd.CategoricalDtype):
+                categories = like[column].cat.categories
+                cube[column] = cube[column].cat.set_categories(
+                    categories.append(cube[column].cat.categories.difference(categories)))
+    return cube
+
+
+def extend_calendar(calendar, order_dates):
+    dates = pd.DatetimeIndex(pd.unique(pd.Series(order_dates).dt.normalize()))
+    dates = dates[~dates.isin(calendar.index)]
+    if len(dates) == 0:
+        return calendar
+    if dates.min() < calendar.index[-1]:
+        return build_calendar(calendar.index.append(dates).to_series())
+    extension = build_calendar(dates.to_series())
+    return concat_segments([calendar, extension]).set_index(calendar.index.append(extension.index))
+
+CUBE_KEYS = ["order_date", "order_hour", "pizza_name"]
+
+def concat_segments(segments):
+    columns = dict()
+    for column in segments[0].columns:
+        values = [segment[column] for segment in segments]
+        if isinstance(values[0].dtype, pd.CategoricalDtype):
+            columns[column] = union_categoricals(values)
+        else:
+            columns[column] = np.concatenate([value.to_numpy() for value in values])
+    return pd.DataFrame(columns)
+
+
+class SalesCube():
+    def __init__(self, segments):
+        self.segments = tuple(segments)
+
+    def frame(self):
+        if len(self.segments) == 1:
+            return self.segments[0]
+        return concat_segments(self.segments)
+
+    def __len__(self):
+        return sum(len(segment) for segment in self.segments)
+
+    def with_batch(self, batch_cube):
+        start = batch_cube["order_date"].iloc[0]
+        segments = list(self.segments)
+        touched = []
+        while segments and segments[-1]["order_date"].iloc[-1] >= start:
+            touched.insert(0, segments.pop())
+        if touched:
+            split = touched[0]["order_date"].searchsorted(start)
+            if split > 0:
+                segments.append(touched[0].iloc[:split])
+            touched[0] = touched[0].iloc[split:]
+        tail = (concat_segments(touched + [batch_cube])
+            .groupby(CUBE_KEYS, as_index=False, observed=True)
+            .agg({"quantity": "sum", "total_price": "sum", "order_weekday": "first", "month": "first"})
+        )
+        segments.append(compact_frame(tail))
+        while len(segments) > 1 and len(segments[-2]) <= 2 * len(segments[-1]):
+            segments[-2:] = [concat_segments(segments[-2:])]
+        return SalesCube(segments)
+
+def cube_segments(cube):
+    return cube.segments if isinstance(cube, SalesCube) else (cube,)
+
+def add_to_cube(cube, batch, calendar):
+    cube = cube if isinstance(cube, SalesCube) else SalesCube([cube])
+    batch_cube = build_sales_cube(batch, calendar, like=cube.segments[-1])
+    return cube.with_batch(batch_cube), batch_cube
+
+
+RANGE_BLOCK_DAYS = 256
+
+class SalesRangeIndex():
+    columns = ("quantity", "total_price")
+
+    def __init__(self, cube):
+        self.dates = np.zeros(0, dtype="datetime64[D]")
+        self.block_starts = np.zeros(1, dtype=np.int64)
+        self.prefix = {column: [np.zeros((1, 25))] for column in self.columns}
+        self.weekday_prefix = {column: [np.zeros((1, 7, 25))] for column in self.columns}
+        for segment in cube_segments(cube):
+            self.add(segment)
+
+    def _day_grids(self, cube):
+        days = cube["order_date"].to_numpy().astype("datetime64[D]")
+        dates, day_codes = np.unique(days, return_inverse=True)
+        hours = cube["order_hour"].to_numpy()
+        weekdays = pd.DatetimeIndex(dates).dayofweek.to_numpy()
+        grids = dict()
+        for column in self.columns:
+            grid = np.zeros((len(dates), 24))
+            np.add.at(grid, (day_codes, hours), cube[column].to_numpy())
+            by_hour = np.zeros((len(dates), 25))
+            np.cumsum(grid, axis=1, out=by_hour[:, 1:])
+            weekday_grid = np.zeros((len(dates), 7, 25))
+            weekday_grid[np.arange(len(dates)), weekdays] = by_hour
+            grids[column] = (by_hour, weekday_grid)
+        return dates, grids
+
+    @staticmethod
+    def _appended(blocks, rows, merge_last):
+        last = blocks[-1]
+        if merge_last:
+            last = np.concatenate([last[:-1], last[-1:] + rows[:1]])
+            rows = rows[1:]
+        tail = np.concatenate([last, last[-1] + np.cumsum(rows, axis=0)])
+        return blocks[:-1] + [tail[i:i + RANGE_BLOCK_DAYS] for i in range(0, len(tail), RANGE_BLOCK_DAYS)]
+
+    def add(self, cube):
+        if len(cube) == 0:
+            return True
+        dates, grids = self._day_grids(cube)
+        if len(self.dates) > 0 and dates[0] < self.dates[-1]:
+            return False
+        merge_last = len(self.dates) > 0 and dates[0] == self.dates[-1]
+        for column, (by_hour, weekday_grid) in grids.items():
+            self.prefix[column] = self._appended(self.prefix[column], by_hour, merge_last)
+            self.weekday_prefix[column] = self._appended(self.weekday_prefix[column], weekday_grid, merge_last)
+        self.block_starts = np.cumsum([0] + [len(block) for block in self.prefix[self.columns[0]][:-1]])
+        self.dates = np.concatenate([self.dates, dates[1:] if merge_last else dates])
+        return True
+
+    def extended(self, cube):
+        index = copy.copy(self)
+        index.prefix, index.weekday_prefix = dict(self.prefix), dict(self.weekday_prefix)
+        return index if index.add(cube) else None
+
+    def _row(self, blocks, row):
+        block = np.searchsorted(self.block_starts, row, side="right") - 1
+        return blocks[block][row - self.block_starts[block]]
+
+    def _rows(self, blocks, first, stop):
+        return np.concatenate([
+            block[max(first - start, 0):stop - start]
+            for block, start in zip(blocks, self.block_starts) if start < stop and start + len(block) > first
+        ])
+
+    @property
+    def first_date(self):
+        return pd.Timestamp(self.dates[0])
+
+    @property
+    def last_date(self):
+        return pd.Timestamp(self.dates[-1])
+
+    def bounds(self, start, end):
+        start = np.datetime64(pd.Timestamp(start).date(), "D")
+        end = np.datetime64(pd.Timestamp(end).date(), "D")
+        return (np.searchsorted(self.dates, start, side="left"),
+            np.searchsorted(self.dates, end, side="right"))
+
+    def n_days(self, start, end):
+        first, last = self.bounds(start, end)
+        return int(last - first)
+
+    def total(self, start, end, hours=(0, 24), column="quantity"):
+        first, last = self.bounds(start, end)
+        hour_start, hour_end = hours
+        last_row, first_row = self._row(self.prefix[column], last), self._row(self.prefix[column], first)
+        return (last_row[hour_end] - first_row[hour_end]
+            - last_row[hour_start] + first_row[hour_start])
+
+    def hourly_totals(self, start, end, column="quantity"):
+        first, last = self.bounds(start, end)
+        return np.diff(self._row(self.prefix[column], last) - self._row(self.prefix[column], first))
+
+    def weekday_totals(self, start, end, hours=(0, 24), column="quantity"):
+        first, last = self.bounds(start, end)
+        hour_start, hour_end = hours
+        window = self._row(self.weekday_prefix[column], last) - self._row(self.weekday_prefix[column], first)
+        return pd.Series(window[:, hour_end] - window[:, hour_start],
+            index=list(WEEKDAYS_PT.values()), name=column)
+
+    def daily_totals(self, start, end, hours=(0, 24), column="quantity"):
+        first, last = self.bounds(start, end)
+        hour_start, hour_end = hours
+        by_hour = np.diff(self._rows(self.prefix[column], first, last + 1), axis=0)
+        return pd.Series(by_hour[:, hour_end] - by_hour[:, hour_start],
+            index=pd.DatetimeIndex(self.dates[first:last], name="order_date"), name=column)
+
+
+class IngredientIndex():
+    def __init__(self, flavors):
+        recipes = [recipe.split(", ") for recipe in flavors["pizza_ingredients"]]
+        self.vocabulary = list(dict.fromkeys(
+            ingredient for recipe in recipes for ingredient in recipe
+        ))
+        self.index = {ingredient: i for i, ingredient in enumerate(self.vocabulary)}
+        n_flavors, V = len(recipes), len(self.vocabulary)
+        self.longest = max((len(recipe) for recipe in recipes), default=0)
+
+        rows = np.repeat(np.arange(n_flavors), [len(recipe) for recipe in recipes])
+        codes = np.array([self.index[ing] for recipe in recipes for ing in recipe], dtype=np.int64)
+        positions = np.concatenate([np.arange(len(recipe)) for recipe in recipes] or [np.zeros(0, dtype=np.int64)])
+
+        self.masks = np.zeros((n_flavors, (V + 63) // 64), dtype=np.uint64)
+        np.bitwise_or.at(self.masks, (rows, codes // 64), np.left_shift(np.uint64(1), (codes % 64).astype(np.uint64)))
+        self.counts = np.zeros((n_flavors, V), dtype=np.int64)
+        np.add.at(self.counts, (rows, codes), 1)
+        self.first_position = np.full((n_flavors, V), self.longest)
+        np.minimum.at(self.first_position, (rows, codes), positions)
+        self.flavors_by_ingredient = {
+            ingredient: np.flatnonzero(self.counts[:, i]) for i, ingredient in enumerate(self.vocabulary)
+        }
+
+    def mask_of(self, ingredients):
+        mask = np.zeros(self.masks.shape[1], dtype=np.uint64)
+        for ingredient in ingredients:
+            i = self.index.get(ingredient)
+            if i is not None:
+                mask[i // 64] |= np.uint64(1) << np.uint64(i % 64)
+        return mask
+
+    def excluding(self, ingredients):
+        return ~(self.masks & self.mask_of(ingredients)).any(axis=1)
+
+    def features(self, selected_rows):
+        rows = np.flatnonzero(selected_rows)
+        totals = self.counts[rows].sum(axis=0)
+        order = rows[:, None] * (self.longest + 1) + self.first_position[rows]
+        first_seen = np.where(self.counts[rows] > 0, order, np.iinfo(np.int64).max).min(axis=0, initial=np.iinfo(np.int64).max)
+        present = np.flatnonzero(totals > 0)
+        ranking = present[np.lexsort((first_seen[present], totals[present]))]
+        return [self.vocabulary[i] for i in ranking], totals[ranking].tolist()
@@ -1,9 +1,18 @@
+import base64
+import io
 import os
+import functools
+import threading
+from collections import OrderedDict
+from xml.sax.saxutils import escape
 import PIL
+import PIL.features
 import PIL.Image
 import PIL.ImageDraw
 import PIL.ImageFont
 import numpy as np
+from render_cache import RenderCache, pool_fingerprint, render_key
+from perf import timed
 
 def list_png_files(folder_path):
     png_files = []
@@ -12,26 +21,119 @@ def list_png_files(folder_path):
             png_files.append(filename)
     return png_files
 
-image_pool = list_png_files("pizza_images")
-
-def polar_mask(angle_size, _angle_offset, total_height, total_width):
-    mask = np.zeros((total_height, total_width), np.uint8)
-    angle_offset = _angle_offset
-    for i in range(total_height):
-        for j in range(total_width):
-            point_angle = np.arctan2(i - total_height / 2, -j + total_width / 2) + np.pi
-            if point_angle >= angle_offset and point_angle <= angle_offset + angle_size:
-                mask[i, j] = 255
-    return PIL.Image.fromarray(mask)
-
-def slice_pizza(pizza_path, angle_size, angle_offset, base_scale = 1.):
-    pizza = PIL.Image.open(pizza_path).convert("RGBA")
-    if base_scale != 1.: 
-        pizza = pizza.resize((int(pizza.width*base_scale), int(pizza.height*base_scale)))
-    mask = polar_mask(angle_size, angle_offset, pizza.height, pizza.width).convert("1")
-    a = pizza.getchannel('A').convert("1")
-    pizza.putalpha(PIL.ImageChops.logical_and(mask, a))
-    return pizza
+IMAGE_DIR = "pizza_images"
+
+@functools.lru_cache(maxsize=1)
+def default_image_pool():
+    return list_png_files(IMAGE_DIR)
+
+def image_paths(image_pool=None):
+    return [f"{IMAGE_DIR}/{name}" for name in image_pool or default_image_pool()]
+
+ANGLE_FIELD_CACHE_SIZE = 8
+
+@functools.lru_cache(maxsize=ANGLE_FIELD_CACHE_SIZE)
+def angle_field(total_height, total_width):
+    i, j = np.ogrid[:total_height, :total_width]
+    field = np.arctan2(i - total_height / 2, -j + total_width / 2) + np.pi
+    field.flags.writeable = False
+    return field
+
+IMAGE_CACHE_BUDGET = 256 * 2**20
+PYRAMID_LEVELS = ()
+
+_image_cache = OrderedDict()
+_image_sizes = dict()
+_image_cache_lock = threading.RLock()
+_image_cache_stats = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0}
+
+def configure_image_cache(budget=None, pyramid_levels=None):
+    global IMAGE_CACHE_BUDGET, PYRAMID_LEVELS
+    with _image_cache_lock:
+        if budget is not None:
+            IMAGE_CACHE_BUDGET = budget
+        if pyramid_levels is not None:
+            PYRAMID_LEVELS = tuple(sorted(set(pyramid_levels)))
+        clear_image_cache()
+
+def clear_image_cache():
+    with _image_cache_lock:
+        _image_cache.clear()
+        _image_cache_stats["bytes"] = 0
+
+def image_cache_info():
+    with _image_cache_lock:
+        return dict(_image_cache_stats, entries=len(_image_cache), budget=IMAGE_CACHE_BUDGET)
+
+def _image_nbytes(image):
+    return image.width * image.height * len(image.getbands())
+
+def _cache_get(key):
+    image = _image_cache.get(key)
+    if image is not None:
+        _image_cache.move_to_end(key)
+    return image
+
+def _cache_put(key, image):
+    cached = _image_cache.get(key)
+    if cached is not None:
+        return cached
+    size = _image_nbytes(image)
+    if size > IMAGE_CACHE_BUDGET:
+        return image
+    _image_cache[key] = image
+    _image_cache_stats["bytes"] += size
+    while _image_cache_stats["bytes"] > IMAGE_CACHE_BUDGET:
+        _, evicted = _image_cache.popitem(last=False)
+        _image_cache_stats["bytes"] -= _image_nbytes(evicted)
+        _image_cache_stats["evictions"] += 1
+    return image
+
+def image_size(pizza_path):
+    size = _image_sizes.get(pizza_path)
+    if size is None:
+        with PIL.Image.open(pizza_path) as image:
+            size = _image_sizes[pizza_path] = image.size
+    return size
+
+def _scaled_size(pizza_path, scale):
+    width, height = _image_sizes[pizza_path]
+    return int(width*scale), int(height*scale)
+
+def _level_image(pizza_path, level):
+    with _image_cache_lock:
+        image = _cache_get((pizza_path, level))
+        if image is not None:
+            return image
+        parent = min([l for l in PYRAMID_LEVELS if l > level] + [1.])
+    if level == 1.:
+        with PIL.Image.open(pizza_path) as source:
+            image = source.convert("RGBA")
+        _image_sizes[pizza_path] = image.size
+    else:
+        image = _level_image(pizza_path, parent).resize(_scaled_size(pizza_path, level))
+    with _image_cache_lock:
+        return _cache_put((pizza_path, level), image)
+
+def build_pyramid(pizza_paths):
+    for pizza_path in pizza_paths:
+        for level in sorted(PYRAMID_LEVELS, reverse=True):
+            _level_image(pizza_path, level)
+
+def load_pizza(pizza_path, base_scale = 1.):
+    with _image_cache_lock:
+        image = _cache_get((pizza_path, base_scale))
+        if image is not None:
+            _image_cache_stats["hits"] += 1
+            return image
+        _image_cache_stats["misses"] += 1
+        level = min([l for l in PYRAMID_LEVELS if l >= base_scale] + [1.])
+    source = _level_image(pizza_path, level)
+    if level == base_scale:
+        return source
+    image = source.resize(_scaled_size(pizza_path, base_scale))
+    with _image_cache_lock:
+        return _cache_put((pizza_path, base_scale), image)
 
 def scale_to_angle(value, min_value, max_value):
     return 2*np.pi* (value - min_value) / (max_value - min_value)
@@ -44,22 +146,58 @@ def rotate_point(radius, angle, center_x, center_y):
 def label_info(label:str, value, total):
     return f"{label}\n{value}\n({value/total*100:.2f}%)"
 
-def pizza_plot(labels, values, image_pool=image_pool, base_scale=1., extended_ratio:float=1.5):
-
-    norm_val = sum(values)
+def slice_label_map(angle_sizes, total_height, total_width):
+    starts = []
     angle_offset = 0
-    angle_size = scale_to_angle(values[0], 0, norm_val)
+    for angle_size in angle_sizes:
+        starts.append(angle_offset)
+        angle_offset += angle_size
+    starts = np.array(starts)
+    ends = starts + np.asarray(angle_sizes, dtype=float)
+    field = angle_field(total_height, total_width)
+    labels = np.searchsorted(starts, field, side="right") - 1
+    np.clip(labels, 0, None, out=labels)
+    covered = field <= ends[labels]
+    on_boundary = (field == starts[labels]) & (labels > 0)
+    return labels, covered, on_boundary
+
+@timed()
+def composite_slices(pizza_paths, angle_sizes, base_scale=1.):
+    unique_paths = list(dict.fromkeys(pizza_paths))
+    slice_source = np.array([unique_paths.index(path) for path in pizza_paths])
+    images = [load_pizza(path, base_scale) for path in unique_paths]
+    stack = np.stack([np.asarray(image) for image in images])
+    alpha_stack = np.stack([
+        np.asarray(image.getchannel("A").convert("1")) for image in images
+    ])
+    total_height, total_width = stack.shape[1:3]
+    labels, covered, on_boundary = slice_label_map(angle_sizes, total_height, total_width)
+
+    rows, cols = np.ogrid[:total_height, :total_width]
+    source = slice_source[labels]
+    chosen = covered & alpha_stack[source, rows, cols]
+    previous_source = slice_source[labels - 1]
+    fallback = on_boundary & ~chosen & alpha_stack[previous_source, rows, cols]
+    source = np.where(fallback, previous_source, source)
+    source[~(chosen | fallback)] = slice_source[0]
+
+    pixels = stack[source, rows, cols]
+    pixels[..., 3] = np.where(chosen | fallback, 255, 0)
+    return PIL.Image.fromarray(pixels, "RGBA")
+
+@timed()
+def pizza_plot(labels, values, image_pool=None, base_scale=1., extended_ratio:float=1.5):
 
-    label_msg = label_info(labels[0], values[0], norm_val)
-    base = slice_pizza(f"pizza_images/{image_pool[0]}", angle_size, angle_offset,
-        base_scale=base_scale)
+    norm_val = sum(values)
+    angle_sizes = [scale_to_angle(value, 0, norm_val) for value in values]
+    pool_paths = image_paths(image_pool)
+    pizza_paths = [pool_paths[i % len(pool_paths)] for i in range(len(values))]
+    base = composite_slices(pizza_paths, angle_sizes, base_scale=base_scale)
     extended_image = PIL.Image.new("RGBA",
         (int(base.width*extended_ratio), int(base.height*extended_ratio)),
         (0, 0, 0, 0)
     )
 
-    print("Teste? ",int(base.width*extended_ratio), int(base.height*extended_ratio))
-
     center_offset = (int((extended_image.width - base.width) / 2), int((extended_image.height - base.height) / 2))
     text_radius = min(center_offset)/2 + base.width/2
     pizza_center = (center_offset[0] + base.width/2, center_offset[1] + base.height/2)
@@ -76,23 +214,100 @@ def pizza_plot(labels, values, image_pool=image_pool, base_scale=1., extended_ra
             stroke_width=max(int(text_radius/200),1), stroke_fill=(255, 255, 255)
         )
 
-    draw_info_stack = [(angle_offset + angle_size/2, label_msg)]
+    angle_offset = 0
+    for label, value, angle_size in zip(labels, values, angle_sizes):
+        draw_info(angle_offset + angle_size/2, label_info(label, value, norm_val))
+        angle_offset += angle_size
+
+    return base
+
+SVG_TEXTURE_LEVELS = (0.125, 0.25, 0.5, 0.75, 1.)
+SVG_TEXTURE_FORMAT = "webp" if PIL.features.check("webp") else "png"
+
+def texture_scale_for(base_scale):
+    return min([level for level in SVG_TEXTURE_LEVELS if level >= base_scale] + [SVG_TEXTURE_LEVELS[-1]])
+
+@functools.lru_cache(maxsize=64)
+def texture_data_uri(pizza_path, scale):
+    buffer = io.BytesIO()
+    load_pizza(pizza_path, scale).save(buffer, format=SVG_TEXTURE_FORMAT)
+    return f"data:image/{SVG_TEXTURE_FORMAT};base64,{base64.b64encode(buffer.getvalue()).decode()}"
+
+def slice_path(center_x, center_y, radius, start, end):
+    points = [rotate_point(radius, angle, center_x, center_y) for angle in (start, (start + end)/2, end)]
+    (x0, y0), (x1, y1), (x2, y2) = points
+    return (f"M{center_x:.2f},{center_y:.2f} L{x0:.2f},{y0:.2f} "
+        f"A{radius:.2f},{radius:.2f} 0 0 0 {x1:.2f},{y1:.2f} "
+        f"A{radius:.2f},{radius:.2f} 0 0 0 {x2:.2f},{y2:.2f} Z")
+
+def svg_text(x, y, info, font_size, anchor_bottom, stroke_width):
+    lines = info.split("\n")
+    line_height = font_size * 1.2
+    first_y = y - (len(lines) - 1) * line_height - font_size * .25 if anchor_bottom else y + font_size * .8
+    spans = "".join(
+        f'<tspan x="{x:.2f}" y="{first_y + i*line_height:.2f}">{escape(line)}</tspan>'
+        for i, line in enumerate(lines)
+    )
+    return (f'<text font-size="{font_size:.2f}" font-family="sans-serif" text-anchor="middle" '
+        f'fill="black" stroke="white" stroke-width="{2*stroke_width}" paint-order="stroke">{spans}</text>')
 
-    angle_offset += angle_size
-    for i, (label, value) in enumerate(zip(labels[1:], values[1:]), 1):
-        label_msg = label_info(label, value, norm_val)
-        angle_size = scale_to_angle(value, 0, norm_val)
-        new_slice = slice_pizza(f"pizza_images/{image_pool[i]}", angle_size, angle_offset,
-            base_scale=base_scale)
-        base.paste(new_slice, center_offset, new_slice)
-        center_angle = angle_offset + angle_size/2
+@timed()
+def pizza_plot_svg(labels, values, image_pool=None, base_scale=1., extended_ratio:float=1.5,
+        texture_scale=None, texture_href=None):
+    norm_val = sum(values)
+    angle_sizes = [scale_to_angle(value, 0, norm_val) for value in values]
+    pool_paths = image_paths(image_pool)
+    pizza_paths = [pool_paths[i % len(pool_paths)] for i in range(len(values))]
+    unique_paths = list(dict.fromkeys(pizza_paths))
+    sizes = [image_size(path) for path in unique_paths]
+    texture_scale = texture_scale_for(base_scale) if texture_scale is None else texture_scale
+    width, height = sizes[0]
+    total_width, total_height = int(width*extended_ratio), int(height*extended_ratio)
+    center_offset = (int((total_width - width) / 2), int((total_height - height) / 2))
+    text_radius = min(center_offset)/2 + width/2
+    pizza_center = (center_offset[0] + width/2, center_offset[1] + height/2)
+    radius = max(width, height)
+
+    defs = []
+    for i, (path, (w, h)) in enumerate(zip(unique_paths, sizes)):
+        href = texture_href(path) if texture_href is not None else texture_data_uri(path, texture_scale)
+        defs.append(f'<image id="pizza{i}" x="{pizza_center[0] - w/2:.2f}" y="{pizza_center[1] - h/2:.2f}" '
+            f'width="{w}" height="{h}" href="{escape(href)}"/>')
+    body = []
+    angle_offset = 0
+    for i, (path, angle_size) in enumerate(zip(pizza_paths, angle_sizes)):
+        if angle_size > 0:
+            defs.append(f'<clipPath id="slice{i}"><path d="{slice_path(*pizza_center, radius, angle_offset, angle_offset + angle_size)}"/></clipPath>')
+            body.append(f'<use href="#pizza{unique_paths.index(path)}" clip-path="url(#slice{i})"/>')
         angle_offset += angle_size
-        draw_info_stack.append((center_angle, label_msg))
 
-    for args in draw_info_stack:
-        draw_info(*args)
+    angle_offset = 0
+    for label, value, angle_size in zip(labels, values, angle_sizes):
+        text_x, text_y = rotate_point(text_radius, angle_offset + angle_size/2, *pizza_center)
+        body.append(svg_text(text_x, text_y, label_info(label, value, norm_val), text_radius/10,
+            text_y > pizza_center[1], max(int(text_radius/200), 1)))
+        angle_offset += angle_size
 
-    return base
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{total_width*base_scale:.0f}" '
+        f'height="{total_height*base_scale:.0f}" viewBox="0 0 {total_width} {total_height}">'
+        f'<defs>{"".join(defs)}</defs>{"".join(body)}</svg>')
+
+render_cache = RenderCache(disk_dir=os.environ.get("PIZZA_RENDER_CACHE_DIR") or None)
+
+def pizza_plot_png(labels, values, image_pool=None, base_scale=1., extended_ratio:float=1.5, cache=render_cache):
+    pizza_paths = image_paths(image_pool)
+    key = render_key(
+        [str(label) for label in labels], [str(value) for value in values],
+        float(base_scale), float(extended_ratio), pool_fingerprint(pizza_paths)
+    )
+
+    def render():
+        buffer = io.BytesIO()
+        pizza_plot(labels, values, image_pool=image_pool, base_scale=base_scale,
+            extended_ratio=extended_ratio).save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    return cache.get_or_render(key, render)
 
 #print('Exemplo para pizza_plot(["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"], [1,1,1,1,1,2,3]).resize((500,500))')
 #image:PIL.Image.Image = pizza_plot(["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"], [1,1,1,1,1, 2, 3]).resize((500,500))
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+_file_digests = dict()
+
+def file_digest(path):
+    stat = os.stat(path)
+    memo_key = (path, stat.st_mtime_ns, stat.st_size)
+    digest = _file_digests.get(memo_key)
+    if digest is None:
+        with open(path, "rb") as file:
+            digest = hashlib.sha256(file.read()).hexdigest()
+        _file_digests[memo_key] = digest
+    return digest
+
+def pool_fingerprint(paths):
+    hasher = hashlib.sha256()
+    for path in paths:
+        hasher.update(path.encode())
+        hasher.update(file_digest(path).encode())
+    return hasher.hexdigest()
+
+def render_key(*parts):
+    return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+class RenderCache():
+    def __init__(self, budget=64 * 2**20, disk_dir=None, disk_budget=512 * 2**20):
+        self.budget = budget
+        self.disk_dir = disk_dir
+        self.disk_budget = disk_budget
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self.lock = threading.Lock()
+        self.inflight = dict()
+        if disk_dir is not None:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def info(self):
+        with self.lock:
+            return dict(self.stats, entries=len(self.entries), bytes=self.bytes, budget=self.budget)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.png")
+
+    def _remember(self, key, data):
+        if len(data) > self.budget or key in self.entries:
+            return
+        self.entries[key] = data
+        self.bytes += len(data)
+        while self.bytes > self.budget:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= len(evicted)
+            self.stats["evictions"] += 1
+
+    def get(self, key):
+        with self.lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return data
+        if self.disk_dir is None:
+            return None
+        try:
+            with open(self._disk_path(key), "rb") as file:
+                data = file.read()
+            os.utime(self._disk_path(key))
+        except FileNotFoundError:
+            return None
+        with self.lock:
+            self.stats["disk_hits"] += 1
+            self._remember(key, data)
+        return data
+
+    def put(self, key, data):
+        with self.lock:
+            self._remember(key, data)
+        if self.disk_dir is not None:
+            tmp_path = f"{self._disk_path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as file:
+                file.write(data)
+            os.replace(tmp_path, self._disk_path(key))
+            self._evict_disk()
+
+    def _evict_disk(self):
+        files = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith(".png"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_budget:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def get_or_render(self, key, render):
+        data = self.get(key)
+        if data is not None:
+            return data
+        with self.lock:
+            key_lock = self.inflight.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                data = self.get(key)
+                if data is None:
+                    with self.lock:
+                        self.stats["misses"] += 1
+                    data = render()
+                    self.put(key, data)
+        finally:
+            with self.lock:
+                self.inflight.pop(key, None)
+        return data
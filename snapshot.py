@@ -0,0 +1,151 @@
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import threading
+import numpy as np
+import pandas as pd
+
+SNAPSHOT_VERSION = 3
+POINTER_FILE = "current.json"
+
+def snapshot_dir(source_path):
+    return f"{source_path}.snapshot"
+
+def source_hash(source_path):
+    hasher = hashlib.sha256()
+    with open(source_path, "rb") as file:
+        for chunk in iter(lambda: file.read(2**20), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def _is_time_column(values):
+    return len(values) > 0 and all(isinstance(value, datetime.time) for value in values[:100])
+
+def _time_to_us(value):
+    return ((value.hour*60 + value.minute)*60 + value.second)*10**6 + value.microsecond
+
+def _us_to_time(us):
+    seconds, microsecond = divmod(int(us), 10**6)
+    return datetime.time(seconds // 3600, seconds // 60 % 60, seconds % 60, microsecond)
+
+def _save_column(folder, index, series):
+    file_name = f"{index}.npy"
+    if series.dtype != object and not isinstance(series.dtype, pd.CategoricalDtype):
+        np.save(os.path.join(folder, file_name), series.to_numpy())
+        return {"kind": "array", "file": file_name}
+    codes, categories = pd.factorize(series, use_na_sentinel=True)
+    if _is_time_column(categories):
+        np.save(os.path.join(folder, file_name), codes.astype(np.int32))
+        return {"kind": "time", "file": file_name,
+            "categories": [_time_to_us(value) for value in categories]}
+    np.save(os.path.join(folder, file_name), codes.astype(np.int32))
+    return {"kind": "strings", "file": file_name, "categories": [str(value) for value in categories]}
+
+def _load_column(folder, column, mmap, compact):
+    values = np.load(os.path.join(folder, column["file"]), mmap_mode="r" if mmap else None)
+    if column["kind"] == "array":
+        return values
+    if column["kind"] == "time":
+        categories = [_us_to_time(us) for us in column["categories"]]
+    else:
+        categories = column["categories"]
+    if compact:
+        return pd.Categorical.from_codes(values, categories).reorder_categories(sorted(categories))
+    categories = np.array(categories + [None], dtype=object)
+    return categories.take(values)
+
+def _write_json(path, data):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(data, file)
+    os.replace(tmp_path, path)
+
+def _read_json(path):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def _remove_stale(folder, keep):
+    for entry in os.scandir(folder):
+        if entry.name in keep or entry.name.endswith(".tmp"):
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path, ignore_errors=True)
+        else:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+def save_snapshot(df, source_path, folder=None, digest=None):
+    folder = folder or snapshot_dir(source_path)
+    digest = digest or source_hash(source_path)
+    content = f"{digest}.v{SNAPSHOT_VERSION}"
+    os.makedirs(folder, exist_ok=True)
+    if not os.path.isdir(os.path.join(folder, content)):
+        tmp_folder = os.path.join(folder, f"{content}.{os.getpid()}.{threading.get_ident()}.tmp")
+        shutil.rmtree(tmp_folder, ignore_errors=True)
+        os.makedirs(tmp_folder)
+        meta = {
+            "columns": [
+                dict(_save_column(tmp_folder, i, df[name]), name=name)
+                for i, name in enumerate(df.columns)
+            ],
+        }
+        with open(os.path.join(tmp_folder, "meta.json"), "w") as file:
+            json.dump(meta, file)
+        try:
+            os.replace(tmp_folder, os.path.join(folder, content))
+        except OSError:
+            shutil.rmtree(tmp_folder, ignore_errors=True)
+            if not os.path.isdir(os.path.join(folder, content)):
+                raise
+    stat = os.stat(source_path)
+    pointer_path = os.path.join(folder, POINTER_FILE)
+    _write_json(pointer_path, {
+        "version": SNAPSHOT_VERSION,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": digest,
+        "content": content,
+    })
+    current = _read_json(pointer_path) or dict()
+    _remove_stale(folder, {POINTER_FILE, content, current.get("content")})
+
+def _fresh_meta(source_path, folder):
+    pointer_path = os.path.join(folder, POINTER_FILE)
+    pointer = _read_json(pointer_path)
+    if pointer is None or pointer.get("version") != SNAPSHOT_VERSION:
+        return None
+    stat = os.stat(source_path)
+    if (pointer["mtime_ns"], pointer["size"]) != (stat.st_mtime_ns, stat.st_size):
+        if pointer["size"] != stat.st_size or pointer["sha256"] != source_hash(source_path):
+            return None
+        pointer["mtime_ns"] = stat.st_mtime_ns
+        try:
+            _write_json(pointer_path, pointer)
+        except OSError:
+            pass
+    meta = _read_json(os.path.join(folder, pointer["content"], "meta.json"))
+    if meta is None:
+        return None
+    return dict(meta, sha256=pointer["sha256"], folder=os.path.join(folder, pointer["content"]))
+
+def snapshot_hash(source_path, folder=None):
+    meta = _fresh_meta(source_path, folder or snapshot_dir(source_path))
+    return None if meta is None else meta["sha256"]
+
+def load_snapshot(source_path, mmap=True, folder=None, compact=True):
+    meta = _fresh_meta(source_path, folder or snapshot_dir(source_path))
+    if meta is None:
+        return None
+    try:
+        return pd.DataFrame({
+            column["name"]: _load_column(meta["folder"], column, mmap, compact) for column in meta["columns"]
+        }, copy=False)
+    except OSError:
+        return None
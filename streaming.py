@@ -0,0 +1,107 @@
+import pandas as pd
+from ingestao import COLUNAS_PEDIDO, normalizar_lote
+from modelo import ModeloCoocorrencia
+from pizza_data import (build_calendar, extend_calendar, build_sales_cube, add_to_cube,
+    build_flavors, add_to_flavors, SalesCube)
+from snapshot import load_snapshot, save_snapshot, snapshot_hash, source_hash
+from perf import timed
+
+CHUNK_ROWS = 2**17
+
+def _xlsx_chunks(path, chunk_rows):
+    import openpyxl
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        chunk = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            chunk.append(row)
+            if len(chunk) == chunk_rows:
+                yield pd.DataFrame.from_records(chunk, columns=header)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame.from_records(chunk, columns=header)
+    finally:
+        workbook.close()
+
+def read_chunks(path, chunk_rows=CHUNK_ROWS):
+    if path.endswith(".jsonl"):
+        chunks = pd.read_json(path, lines=True, dtype=False, convert_dates=False, chunksize=chunk_rows)
+    elif path.endswith(".csv"):
+        chunks = pd.read_csv(path, chunksize=chunk_rows)
+    else:
+        chunks = _xlsx_chunks(path, chunk_rows)
+    for chunk in chunks:
+        yield normalizar_lote(chunk, path)[COLUNAS_PEDIDO]
+
+
+class SalesAggregator():
+    def __init__(self):
+        self.calendar = None
+        self.cube = None
+        self.flavors = None
+        self.modelo = ModeloCoocorrencia()
+        self.rows = 0
+
+    def add(self, chunk):
+        if len(chunk) == 0:
+            return
+        if self.calendar is None:
+            self.calendar = build_calendar(chunk["order_date"])
+            self.cube = SalesCube([build_sales_cube(chunk, self.calendar)])
+            self.flavors = build_flavors(chunk)
+        else:
+            self.calendar = extend_calendar(self.calendar, chunk["order_date"])
+            self.cube, _ = add_to_cube(self.cube, chunk, self.calendar)
+            self.flavors = add_to_flavors(self.flavors, chunk)
+        self.modelo.partial_fit(chunk)
+        self.rows += len(chunk)
+
+
+def cube_dir(path):
+    return f"{path}.cube"
+
+def flavors_dir(path):
+    return f"{path}.flavors"
+
+def modelo_dir(path):
+    return f"{path}.modelo"
+
+def _load_cached(path):
+    digest = snapshot_hash(path, cube_dir(path))
+    if digest is None or snapshot_hash(path, flavors_dir(path)) != digest:
+        return None
+    try:
+        modelo = ModeloCoocorrencia.carregar(modelo_dir(path), digest)
+    except OSError:
+        return None
+    if modelo is None:
+        return None
+    cube = load_snapshot(path, mmap=False, folder=cube_dir(path))
+    flavors = load_snapshot(path, mmap=False, folder=flavors_dir(path), compact=False)
+    if cube is None or flavors is None:
+        return None
+    return build_calendar(cube["order_date"]), cube, flavors.sort_values('quantity'), modelo
+
+@timed()
+def load_sales(path="pizza_dataset.xlsx", chunk_rows=CHUNK_ROWS):
+    cached = _load_cached(path)
+    if cached is not None:
+        return cached
+    aggregator = SalesAggregator()
+    for chunk in read_chunks(path, chunk_rows):
+        aggregator.add(chunk)
+    if aggregator.calendar is None:
+        raise ValueError(f"{path}: nenhum pedido encontrado")
+    cube = aggregator.cube.frame()
+    try:
+        digest = source_hash(path)
+        save_snapshot(cube, path, cube_dir(path), digest)
+        save_snapshot(aggregator.flavors.sort_index(), path, flavors_dir(path), digest)
+        aggregator.modelo.salvar(modelo_dir(path), digest)
+    except OSError:
+        pass
+    return aggregator.calendar, cube, aggregator.flavors, aggregator.modelo
@@ -0,0 +1,64 @@
+import datetime
+import numpy as np
+import pandas as pd
+
+XLSX_MAX_ROWS = 1_048_575
+
+HOUR_WEIGHTS = np.array([
+    0, 0, 0, 0, 0, 0, 0, 0, 0,
+    1, 8, 30, 60, 55, 30, 25, 30, 45, 50, 40, 30, 15, 5, 1,
+], dtype=float)
+
+def synthetic_menu(n_pizzas=32, n_ingredients=65, seed=0):
+    rng = np.random.default_rng(seed)
+    ingredients = [f"Ingrediente {i:04d}" for i in range(n_ingredients)]
+    popularity = 1 / np.arange(1, n_ingredients + 1)
+    popularity /= popularity.sum()
+    menu = dict()
+    for i in range(n_pizzas):
+        size = int(rng.integers(3, min(9, n_ingredients) + 1))
+        recipe = rng.choice(n_ingredients, size, replace=False, p=popularity)
+        menu[f"The Pizza {i:04d}"] = ", ".join(ingredients[j] for j in recipe)
+    return menu
+
+def synthetic_orders(n_rows, n_pizzas=32, n_ingredients=65, days=365, seed=0):
+    rng = np.random.default_rng(seed)
+    menu = synthetic_menu(n_pizzas, n_ingredients, seed)
+    names = np.array(list(menu.keys()), dtype=object)
+    recipes = np.array(list(menu.values()), dtype=object)
+    pizza_weights = rng.pareto(2., len(names)) + 1
+    pizza = rng.choice(len(names), n_rows, p=pizza_weights / pizza_weights.sum())
+
+    day = np.sort(rng.integers(0, days, n_rows))
+    order_date = np.datetime64("2015-01-01") + day.astype("timedelta64[D]")
+    hour = rng.choice(24, n_rows, p=HOUR_WEIGHTS / HOUR_WEIGHTS.sum())
+    second = hour * 3600 + rng.integers(0, 3600, n_rows)
+    codes, uniques = pd.factorize(second)
+    times = np.array([datetime.time(s // 3600, s // 60 % 60, s % 60) for s in uniques], dtype=object)
+
+    quantity = rng.choice([1, 2, 3, 4], n_rows, p=[.9, .08, .015, .005])
+    unit_price = rng.choice([12., 16., 20.5, 25.5, 35.95], n_rows, p=[.3, .3, .3, .08, .02])
+
+    return pd.DataFrame({
+        "order_date": order_date.astype("datetime64[ns]"),
+        "order_time": times[codes],
+        "pizza_name": names[pizza],
+        "pizza_ingredients": recipes[pizza],
+        "quantity": quantity,
+        "total_price": unit_price * quantity,
+    })
+
+def write_xlsx(df, path):
+    import openpyxl
+    if len(df) > XLSX_MAX_ROWS:
+        raise ValueError(f"{len(df)} linhas não cabem em uma planilha xlsx")
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(list(df.columns))
+    for row in df.itertuples(index=False):
+        sheet.append([
+            value.to_pydatetime() if isinstance(value, pd.Timestamp) else
+            value.item() if isinstance(value, np.generic) else value
+            for value in row
+        ])
+    workbook.save(path)
@@ -0,0 +1,73 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from ingestao import Ingestor
+from modelo import ModeloCoocorrencia
+from pizza_data import build_calendar, build_flavors, build_sales_cube, SalesRangeIndex
+from synthetic import synthetic_orders
+
+def escrever_lote(caminho, lote, idade=0.):
+    lote.to_csv(caminho, index=False)
+    instante = time.time() - idade
+    os.utime(caminho, (instante, instante))
+
+def novo_ingestor(pasta, historico):
+    calendar = build_calendar(historico["order_date"])
+    cube = build_sales_cube(historico, calendar)
+    return Ingestor(str(pasta), calendar, cube, SalesRangeIndex(cube),
+        ModeloCoocorrencia(historico), build_flavors(historico))
+
+def test_lote_em_escrita_lido_uma_vez_completo(tmp_path):
+    pedidos = synthetic_orders(1100, seed=2)
+    historico, lote = pedidos.iloc[:1000].copy(), pedidos.iloc[1000:].reset_index(drop=True)
+    ingestor = novo_ingestor(tmp_path, historico)
+    total = ingestor.vendas.cube.frame()["quantity"].sum()
+
+    escrever_lote(tmp_path / "lote.csv", lote.iloc[:50])
+    assert ingestor.atualizar() == 0
+    escrever_lote(tmp_path / "lote.csv", lote, idade=10.)
+    assert ingestor.atualizar() == 100
+    assert ingestor.atualizar() == 0
+    escrever_lote(tmp_path / "lote.csv", pd.concat([lote, lote]), idade=10.)
+    assert ingestor.atualizar() == 0
+
+    assert ingestor.lotes == [100]
+    assert ingestor.vendas.cube.frame()["quantity"].sum() == total + lote["quantity"].sum()
+
+def test_lote_troca_o_estado_inteiro(tmp_path):
+    pedidos = synthetic_orders(1200, seed=4)
+    ingestor = novo_ingestor(tmp_path, pedidos.iloc[:1000].copy())
+    anterior = ingestor.vendas
+    prefixo = np.concatenate(anterior.range_index.prefix["quantity"])
+    bruto = np.array(anterior.modelo.bruto)
+    escrever_lote(tmp_path / "lote.csv", pedidos.iloc[1000:], idade=10.)
+    assert ingestor.atualizar() == 200
+
+    assert ingestor.vendas is not anterior
+    np.testing.assert_array_equal(np.concatenate(anterior.range_index.prefix["quantity"]), prefixo)
+    np.testing.assert_array_equal(anterior.modelo.bruto, bruto)
+    assert len(anterior.ingredient_index.masks) == len(anterior.flavors)
+    vendas = ingestor.vendas
+    assert len(vendas.ingredient_index.masks) == len(vendas.flavors)
+    assert vendas.range_index.total(vendas.range_index.first_date, vendas.range_index.last_date) == pedidos["quantity"].sum()
+
+def test_lote_reagrega_so_a_cauda_do_cubo(tmp_path):
+    pedidos = synthetic_orders(3000, seed=6)
+    ingestor = novo_ingestor(tmp_path, pedidos.iloc[:2500].copy())
+    historico = ingestor.vendas.cube.segments[0]
+    for i, inicio in enumerate(range(2500, 3000, 100)):
+        escrever_lote(tmp_path / f"lote{i}.csv", pedidos.iloc[inicio:inicio + 100], idade=10.)
+        assert ingestor.atualizar() == 100
+
+    cube = ingestor.vendas.cube
+    assert len(cube.segments) > 1
+    assert np.shares_memory(cube.segments[0]["quantity"].to_numpy(), historico["quantity"].to_numpy())
+    assert all(isinstance(segmento["pizza_name"].dtype, pd.CategoricalDtype) for segmento in cube.segments)
+    esperado = build_sales_cube(pedidos, build_calendar(pedidos["order_date"]))
+    chaves = ["order_date", "order_hour", "pizza_name"]
+    obtido = cube.frame().astype({"pizza_name": str}).sort_values(chaves).reset_index(drop=True)
+    esperado = esperado.astype({"pizza_name": str}).sort_values(chaves).reset_index(drop=True)
+    pd.testing.assert_frame_equal(obtido[chaves], esperado[chaves])
+    np.testing.assert_array_equal(obtido["quantity"], esperado["quantity"])
+    np.testing.assert_allclose(obtido["total_price"], esperado["total_price"])
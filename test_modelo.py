@@ -0,0 +1,112 @@
+import itertools
+import numpy as np
+import pytest
+from modelo import ModeloCoocorrencia
+from synthetic import synthetic_orders
+
+class ModeloDicionario():
+    def __init__(self, df):
+        coocorrencias = dict()
+        qtd_total = dict()
+        preco_total = dict()
+        for i, row in df.iterrows():
+            ingredientes = row['pizza_ingredients'].split(", ")
+            qtd = row['quantity']
+            preco = row['total_price']
+            peso = preco/(qtd*len(ingredientes))
+            for ingrediente in ingredientes:
+                qtd_total[ingrediente] = qtd_total.get(ingrediente, 0) + qtd
+                preco_total[ingrediente] = preco_total.get(ingrediente, 0) + preco
+                if coocorrencias.get(ingrediente, None) is None:
+                    coocorrencias[ingrediente] = dict()
+                hist = coocorrencias[ingrediente]
+                for ingrediente_target in ingredientes:
+                    hist[ingrediente_target] = hist.get(ingrediente_target, 0) + peso
+        for ingrediente in coocorrencias.keys():
+            hist = coocorrencias[ingrediente]
+            fator_norm = hist[ingrediente]
+            for ingrediente_target in hist.keys():
+                hist[ingrediente_target] /= fator_norm
+
+        self.coocorrencias = coocorrencias
+        self.qtd_total = qtd_total
+        self.preco_total = preco_total
+
+    def top_k_sugestoes(self, k, ingredientes_selecionados):
+        acumulado = dict()
+        for ingrediente in ingredientes_selecionados:
+            hist = self.coocorrencias[ingrediente]
+            for ing_target, value in hist.items():
+                acumulado[ing_target] = acumulado.get(ing_target, 0) + value
+        for ingrediente in ingredientes_selecionados: acumulado.pop(ingrediente)
+        return sorted(acumulado.keys(), key=lambda key : acumulado[key], reverse=True)[:k]
+
+@pytest.fixture(scope="module")
+def pedidos():
+    return synthetic_orders(3000, n_pizzas=24, n_ingredients=40, seed=7)
+
+@pytest.fixture(scope="module")
+def referencia(pedidos):
+    return ModeloDicionario(pedidos)
+
+@pytest.fixture(scope="module")
+def selecoes(referencia):
+    vocabulario = list(referencia.coocorrencias)
+    rng = np.random.default_rng(0)
+    selecoes = [[ingrediente] for ingrediente in vocabulario]
+    selecoes += [list(par) for par in itertools.permutations(vocabulario[:12], 2)]
+    selecoes += [[vocabulario[i] for i in rng.choice(len(vocabulario), rng.integers(3, 7), replace=False)] for _ in range(100)]
+    return selecoes
+
+def test_treino_igual_ao_dicionario(pedidos, referencia):
+    modelo = ModeloCoocorrencia(pedidos)
+    assert modelo.coocorrencias == referencia.coocorrencias
+    for ingrediente, hist in referencia.coocorrencias.items():
+        assert list(modelo.coocorrencias[ingrediente]) == list(hist)
+    assert {ing: int(modelo.qtd_total[modelo.indice[ing]]) for ing in referencia.qtd_total} == referencia.qtd_total
+    assert {ing: float(modelo.preco_total[modelo.indice[ing]]) for ing in referencia.preco_total} == referencia.preco_total
+
+@pytest.mark.parametrize("k", [1, 5, 32, 40, 100])
+def test_sugestoes_iguais_ao_dicionario(pedidos, referencia, selecoes, k):
+    modelo = ModeloCoocorrencia(pedidos)
+    esperado = [referencia.top_k_sugestoes(k, selecao) for selecao in selecoes]
+    assert [modelo.top_k_sugestoes(k, selecao) for selecao in selecoes] == esperado
+    assert [modelo.top_k_sugestoes(k, selecao) for selecao in selecoes] == esperado
+    assert modelo.top_k_sugestoes_lote(k, selecoes) == esperado
+
+def test_partial_fit_igual_ao_treino_completo(pedidos, referencia, selecoes):
+    modelo = ModeloCoocorrencia()
+    for inicio in range(0, len(pedidos), 700):
+        modelo.partial_fit(pedidos.iloc[inicio:inicio + 700])
+        modelo.top_k_sugestoes(5, selecoes[0])
+    assert modelo.coocorrencias == referencia.coocorrencias
+    assert [modelo.top_k_sugestoes(10, selecao) for selecao in selecoes] == [
+        referencia.top_k_sugestoes(10, selecao) for selecao in selecoes]
+
+def test_artefato_salvo_e_carregado(tmp_path, pedidos, referencia, selecoes):
+    ModeloCoocorrencia(pedidos).salvar(tmp_path / "modelo", "impressao")
+    assert ModeloCoocorrencia.carregar(tmp_path / "modelo", "outra") is None
+    modelo = ModeloCoocorrencia.carregar(tmp_path / "modelo", "impressao")
+    assert [modelo.top_k_sugestoes(10, selecao) for selecao in selecoes] == [
+        referencia.top_k_sugestoes(10, selecao) for selecao in selecoes]
+
+def test_tabela_atualizada_igual_a_reconstruida():
+    pedidos = synthetic_orders(2000, n_pizzas=60, n_ingredients=150, seed=11)
+    modelo = ModeloCoocorrencia(pedidos.iloc[:300])
+    vocabulario_inicial = len(modelo.vocabulario)
+    modelo.tabela
+    for inicio in range(300, len(pedidos), 400):
+        anterior = modelo
+        modelo = modelo.copia().partial_fit(pedidos.iloc[inicio:inicio + 400])
+        reconstruida = modelo.copia()
+        reconstruida._construir_tabela()
+        simples, chaves, pares = modelo.tabela
+        np.testing.assert_array_equal(simples, reconstruida.tabela_simples)
+        posicao = np.searchsorted(reconstruida.tabela_chaves, chaves)
+        np.testing.assert_array_equal(reconstruida.tabela_chaves[posicao], chaves)
+        np.testing.assert_array_equal(reconstruida.tabela_pares[posicao], pares)
+        modelo.completar_tabela()
+        for atualizada, esperada in zip(modelo.tabela, reconstruida.tabela):
+            np.testing.assert_array_equal(atualizada, esperada)
+    assert len(modelo.vocabulario) > vocabulario_inicial
+    assert len(anterior.tabela_simples) == len(anterior.vocabulario)
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+import pizza_data
+from pizza_data import build_calendar, build_sales_cube, SalesRangeIndex, WEEKDAYS_PT
+from synthetic import synthetic_orders
+
+@pytest.fixture(scope="module")
+def pedidos():
+    pedidos = synthetic_orders(4000, days=60, seed=9)
+    pedidos["order_hour"] = [value.hour for value in pedidos["order_time"]]
+    return pedidos
+
+def janela(pedidos, start, end, hours):
+    datas = pedidos["order_date"].dt.normalize()
+    return pedidos[(datas >= start) & (datas <= end)
+        & (pedidos["order_hour"] >= hours[0]) & (pedidos["order_hour"] < hours[1])]
+
+def janelas(pedidos, n):
+    rng = np.random.default_rng(0)
+    dias = pedidos["order_date"].to_numpy().astype("datetime64[D]")
+    datas = pd.DatetimeIndex(np.arange(dias.min() - np.timedelta64(2, "D"), dias.max() + np.timedelta64(3, "D")))
+    for _ in range(n):
+        start, end = sorted(rng.choice(datas, 2))
+        hours = tuple(sorted(rng.integers(0, 25, 2)))
+        yield pd.Timestamp(start), pd.Timestamp(end), hours
+    yield datas[0], datas[-1], (0, 24)
+    yield datas[5], datas[5], (12, 13)
+    yield datas[5], datas[5], (12, 12)
+
+def conferir(range_index, pedidos, n=120):
+    for start, end, hours in janelas(pedidos, n):
+        selecionados = janela(pedidos, start, end, hours)
+        assert range_index.total(start, end, hours) == selecionados["quantity"].sum()
+        assert range_index.total(start, end, hours, "total_price") == pytest.approx(selecionados["total_price"].sum())
+
+        por_dia_da_semana = (selecionados.groupby(selecionados["order_date"].dt.dayofweek)["quantity"].sum()
+            .reindex(range(7), fill_value=0))
+        weekday_totals = range_index.weekday_totals(start, end, hours)
+        assert list(weekday_totals.index) == list(WEEKDAYS_PT.values())
+        np.testing.assert_array_equal(weekday_totals.to_numpy(), por_dia_da_semana.to_numpy())
+
+        dias = janela(pedidos, start, end, (0, 24))["order_date"].dt.normalize()
+        por_dia = (selecionados.groupby(selecionados["order_date"].dt.normalize())["quantity"].sum()
+            .reindex(pd.DatetimeIndex(np.unique(dias)), fill_value=0))
+        daily_totals = range_index.daily_totals(start, end, hours)
+        np.testing.assert_array_equal(daily_totals.index.to_numpy(), por_dia.index.to_numpy())
+        np.testing.assert_array_equal(daily_totals.to_numpy(), por_dia.to_numpy())
+        assert range_index.n_days(start, end) == len(por_dia)
+
+        por_hora = janela(pedidos, start, end, (0, 24)).groupby("order_hour")["quantity"].sum().reindex(range(24), fill_value=0)
+        np.testing.assert_array_equal(range_index.hourly_totals(start, end), por_hora.to_numpy())
+
+@pytest.mark.parametrize("block_days", [256, 7, 1])
+def test_range_index_igual_a_forca_bruta(monkeypatch, pedidos, block_days):
+    monkeypatch.setattr(pizza_data, "RANGE_BLOCK_DAYS", block_days)
+    cube = build_sales_cube(pedidos, build_calendar(pedidos["order_date"]))
+    range_index = SalesRangeIndex(cube)
+    assert range_index.first_date == pedidos["order_date"].min()
+    assert range_index.last_date == pedidos["order_date"].max()
+    conferir(range_index, pedidos)
+
+@pytest.mark.parametrize("block_days", [256, 7])
+def test_range_index_estendido_em_lotes(monkeypatch, pedidos, block_days):
+    monkeypatch.setattr(pizza_data, "RANGE_BLOCK_DAYS", block_days)
+    calendar = build_calendar(pedidos["order_date"])
+    cortes = [1500, 1501, 2222, 3000, 3999, len(pedidos)]
+    assert (pedidos["order_date"].iloc[1499] == pedidos["order_date"].iloc[1500]
+        and pedidos["order_date"].iloc[2221] == pedidos["order_date"].iloc[2222])
+    range_index = SalesRangeIndex(build_sales_cube(pedidos.iloc[:cortes[0]], calendar))
+    anteriores = []
+    for inicio, fim in zip(cortes, cortes[1:]):
+        anteriores.append((range_index, inicio))
+        range_index = range_index.extended(build_sales_cube(pedidos.iloc[inicio:fim], calendar))
+    conferir(range_index, pedidos)
+    for anterior, fim in anteriores[::2]:
+        conferir(anterior, pedidos.iloc[:fim], 30)
+    assert range_index.extended(build_sales_cube(pedidos.iloc[:10], calendar)) is None
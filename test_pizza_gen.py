@@ -0,0 +1,61 @@
+import os
+import numpy as np
+import PIL.Image
+import PIL.ImageChops
+import pytest
+import pizza_gen
+
+def polar_mask_loop(angle_size, angle_offset, total_height, total_width):
+    mask = np.zeros((total_height, total_width), np.uint8)
+    for i in range(total_height):
+        for j in range(total_width):
+            point_angle = np.arctan2(i - total_height / 2, -j + total_width / 2) + np.pi
+            if point_angle >= angle_offset and point_angle <= angle_offset + angle_size:
+                mask[i, j] = 255
+    return mask
+
+@pytest.mark.parametrize("total_height,total_width", [(35, 36), (40, 41), (71, 70), (64, 64), (1, 7)])
+@pytest.mark.parametrize("angle_size,angle_offset", [
+    (np.pi/2, 0), (2*np.pi/7, 3*2*np.pi/7), (np.pi, np.pi), (0.3, 5.9), (2*np.pi, 0), (0., np.pi/4),
+])
+def test_angle_field_matches_loop(angle_size, angle_offset, total_height, total_width):
+    expected = polar_mask_loop(angle_size, angle_offset, total_height, total_width)
+    field = pizza_gen.angle_field(total_height, total_width)
+    mask = ((field >= angle_offset) & (field <= angle_offset + angle_size)).astype(np.uint8) * 255
+    np.testing.assert_array_equal(mask, expected)
+
+def test_angle_field_is_cached_and_read_only():
+    field = pizza_gen.angle_field(33, 34)
+    assert pizza_gen.angle_field(33, 34) is field
+    assert not field.flags.writeable
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def slice_pizza_loop(pizza_path, angle_size, angle_offset, base_scale):
+    pizza = pizza_gen.load_pizza(pizza_path, base_scale).copy()
+    mask = PIL.Image.fromarray(polar_mask_loop(angle_size, angle_offset, pizza.height, pizza.width)).convert("1")
+    pizza.putalpha(PIL.ImageChops.logical_and(mask, pizza.getchannel("A").convert("1")))
+    return pizza
+
+def composite_by_paste(pizza_paths, angle_sizes, base_scale):
+    base = None
+    angle_offset = 0
+    for pizza_path, angle_size in zip(pizza_paths, angle_sizes):
+        pizza = slice_pizza_loop(pizza_path, angle_size, angle_offset, base_scale)
+        if base is None:
+            base = pizza
+        else:
+            base.paste(pizza, (0, 0), pizza)
+        angle_offset += angle_size
+    return np.asarray(base)
+
+@pytest.mark.parametrize("values", [[1, 1, 1, 1, 1, 2, 3], [5, 0, 3, 2, 7, 1, 1], [1, 1, 1, 1], [3], list(range(1, 25))])
+def test_composite_slices_matches_paste(monkeypatch, values):
+    monkeypatch.chdir(REPO_DIR)
+    norm_val = sum(values)
+    angle_sizes = [pizza_gen.scale_to_angle(value, 0, norm_val) for value in values]
+    pool_paths = pizza_gen.image_paths()
+    pizza_paths = [pool_paths[i % len(pool_paths)] for i in range(len(values))]
+    expected = composite_by_paste(pizza_paths, angle_sizes, 0.06)
+    composite = np.asarray(pizza_gen.composite_slices(pizza_paths, angle_sizes, base_scale=0.06))
+    np.testing.assert_array_equal(composite, expected)
@@ -0,0 +1,15 @@
+import pytest
+from render_cache import RenderCache
+
+def test_falha_no_render_libera_a_chave():
+    cache = RenderCache()
+
+    def falhar():
+        raise ValueError("render falhou")
+
+    with pytest.raises(ValueError):
+        cache.get_or_render("chave", falhar)
+    assert cache.inflight == dict()
+    assert cache.get_or_render("chave", lambda: b"png") == b"png"
+    assert cache.get_or_render("chave", falhar) == b"png"
+    assert cache.inflight == dict()
@@ -0,0 +1,39 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import snapshot
+from snapshot import load_snapshot, save_snapshot, snapshot_dir
+
+def pedidos(n):
+    return pd.DataFrame({"quantity": list(range(n)), "pizza_name": [f"pizza {i % 3}" for i in range(n)]})
+
+def test_troca_de_snapshot_nao_quebra_leitor(tmp_path, monkeypatch):
+    fonte = tmp_path / "pedidos.csv"
+    fonte.write_text("v1\n")
+    save_snapshot(pedidos(5), str(fonte))
+    meta_antiga = snapshot._fresh_meta(str(fonte), snapshot_dir(str(fonte)))
+
+    fonte.write_text("v2, maior\n")
+    save_snapshot(pedidos(7), str(fonte))
+    assert not os.path.exists(meta_antiga["folder"])
+    carregado = load_snapshot(str(fonte), mmap=False)
+    pd.testing.assert_frame_equal(carregado.astype({"pizza_name": str}), pedidos(7))
+
+    monkeypatch.setattr(snapshot, "_fresh_meta", lambda *args: meta_antiga)
+    assert load_snapshot(str(fonte)) is None
+
+def test_gravacoes_e_leituras_concorrentes(tmp_path):
+    fonte = tmp_path / "pedidos.csv"
+    fonte.write_text("v1\n")
+    df = pedidos(50)
+
+    def gravar_e_ler(_):
+        save_snapshot(df, str(fonte))
+        return load_snapshot(str(fonte), mmap=False)
+
+    with ThreadPoolExecutor(8) as pool:
+        carregados = list(pool.map(gravar_e_ler, range(32)))
+    for carregado in carregados:
+        assert carregado is None or carregado["quantity"].tolist() == df["quantity"].tolist()
+    meta = snapshot._fresh_meta(str(fonte), snapshot_dir(str(fonte)))
+    assert set(os.listdir(snapshot_dir(str(fonte)))) == {snapshot.POINTER_FILE, os.path.basename(meta["folder"])}
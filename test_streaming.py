@@ -0,0 +1,26 @@
+import pandas as pd
+import pytest
+from modelo import ModeloCoocorrencia
+from pizza_data import build_calendar, build_flavors, build_sales_cube
+from streaming import load_sales, read_chunks
+from synthetic import synthetic_orders, write_xlsx
+
+@pytest.mark.parametrize("extensao", ["csv", "xlsx"])
+def test_leitura_em_blocos_igual_a_de_uma_vez(tmp_path, extensao):
+    pedidos = synthetic_orders(3000, seed=3)
+    caminho = str(tmp_path / f"pedidos.{extensao}")
+    if extensao == "xlsx":
+        write_xlsx(pedidos, caminho)
+    else:
+        pedidos.to_csv(caminho, index=False)
+    completo = next(read_chunks(caminho, len(pedidos)))
+    cube = build_sales_cube(completo, build_calendar(completo["order_date"]))
+    flavors = build_flavors(completo)
+    coocorrencias = ModeloCoocorrencia(completo).coocorrencias
+
+    for _ in range(2):
+        calendar, cube_blocos, flavors_blocos, modelo = load_sales(caminho, chunk_rows=317)
+        pd.testing.assert_frame_equal(cube_blocos, cube, check_exact=False)
+        pd.testing.assert_frame_equal(flavors_blocos, flavors)
+        assert modelo.coocorrencias == coocorrencias
+        pd.testing.assert_index_equal(calendar.index, build_calendar(completo["order_date"]).index)
@@ -0,0 +1,70 @@
+import re
+import numpy as np
+import pandas as pd
+import pytest
+from pizza_data import build_flavors, IngredientIndex
+from synthetic import synthetic_orders
+from views import flavors_view
+
+def extract_ingredient_features(dataframe):
+    res = dict()
+    for i, row in dataframe.iterrows():
+        for ingredient in row['pizza_ingredients'].split(", "):
+            res[ingredient] = res.get(ingredient, 0) + 1
+    feature_labels = []
+    feature_values = []
+    for tup in sorted(res.items(), key=lambda tup : tup[1]):
+        feature_labels.append(tup[0])
+        feature_values.append(tup[1])
+    return feature_labels, feature_values
+
+def flavors_view_regex(N, _Ningr, ingredient_filter_list, flavors_base):
+    if len(ingredient_filter_list) > 0:
+        pizza_sales = (flavors_base[
+            ~flavors_base['pizza_ingredients'].str
+                .contains("|".join(map(re.escape, ingredient_filter_list)))
+            ]
+        )
+    else:
+        pizza_sales = flavors_base
+
+    topN = pizza_sales.tail(N)
+    botN = pizza_sales.head(N)
+
+    top_feature_labels, top_feature_values = extract_ingredient_features(pizza_sales)
+    Ningr = min(_Ningr, len(top_feature_labels))
+    return topN, botN, (top_feature_labels[-Ningr:], top_feature_values[-Ningr:]), (top_feature_labels[:Ningr], top_feature_values[:Ningr])
+
+@pytest.fixture(scope="module")
+def flavors():
+    return build_flavors(synthetic_orders(4000, n_pizzas=40, n_ingredients=60, seed=3))
+
+@pytest.fixture(scope="module")
+def filtros(flavors):
+    vocabulario = IngredientIndex(flavors).vocabulary
+    rng = np.random.default_rng(1)
+    filtros = [[], ["Ingrediente inexistente"], vocabulario[:1], vocabulario[-1:]]
+    filtros += [[vocabulario[i] for i in rng.choice(len(vocabulario), rng.integers(1, 5), replace=False)] for _ in range(40)]
+    return filtros
+
+@pytest.mark.parametrize("N,Ningr", [(5, 10), (1, 1), (40, 100)])
+def test_flavors_view_igual_ao_regex(flavors, filtros, N, Ningr):
+    ingredient_index = IngredientIndex(flavors)
+    for filtro in filtros:
+        esperado = flavors_view_regex(N, Ningr, filtro, flavors)
+        obtido = flavors_view(N, Ningr, filtro, flavors, ingredient_index)
+        pd.testing.assert_frame_equal(obtido[0], esperado[0])
+        pd.testing.assert_frame_equal(obtido[1], esperado[1])
+        assert obtido[2:] == esperado[2:]
+
+def test_filtro_usa_o_nome_inteiro_do_ingrediente():
+    flavors = pd.DataFrame({
+        "pizza_name": ["Margherita", "Mediterranean", "Pepperoni"],
+        "pizza_ingredients": ["Tomatoes, Mozzarella Cheese", "Sun-dried Tomatoes, Feta Cheese", "Pepperoni, Mozzarella Cheese"],
+        "quantity": [10, 20, 30],
+    })
+    ingredient_index = IngredientIndex(flavors)
+    topN, _, top_features, _ = flavors_view(3, 10, ["Tomatoes"], flavors, ingredient_index)
+    assert topN["pizza_name"].tolist() == ["Mediterranean", "Pepperoni"]
+    assert "Sun-dried Tomatoes" in top_features[0] and "Tomatoes" not in top_features[0]
+    assert flavors_view_regex(3, 10, ["Tomatoes"], flavors)[0]["pizza_name"].tolist() == ["Pepperoni"]
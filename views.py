@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+from pizza_data import calendar_lookup, cube_segments
+from perf import timed
+
+def month_slice(cube, month_indexes):
+    segments = cube_segments(cube)
+    pieces = []
+    for segment in segments:
+        months = segment['month'].to_numpy()
+        starts = np.flatnonzero(np.diff(months, prepend=-1))
+        kept = np.isin(months[starts], month_indexes)
+        edges = np.diff(np.concatenate(([0], kept.astype(np.int8), [0])))
+        bounds = np.append(starts, len(months))
+        pieces += [segment.iloc[bounds[a]:bounds[b]] for a, b in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1))]
+    return pieces or [segments[0].iloc[:0]]
+
+def quantity_by(pieces, key):
+    sums = [piece.groupby(key, observed=True)[['quantity']].sum() for piece in pieces]
+    if len(sums) > 1:
+        sums = [pd.concat(sums).groupby(level=0, observed=True).sum()]
+    return sums[0].astype({'quantity': 'int64'})
+
+@timed()
+def weekday_view(month_indexes, cube):
+    weekdays = (quantity_by(month_slice(cube, month_indexes), "order_weekday")
+        .sort_values('quantity', ascending=False)
+    )
+    return weekdays
+
+@timed()
+def days_topN_view(month_indexes, N, cube, calendar):
+    weekdays = (quantity_by(month_slice(cube, month_indexes), 'order_date')
+        .reset_index()
+        .sort_values('quantity', ascending=False)
+        .head(N)
+    )
+    weekdays["order_date"] = calendar_lookup(calendar, weekdays["order_date"], "pretty_date")
+    return weekdays
+
+@timed()
+def days_botN_view(month_indexes, N, cube, calendar):
+    weekdays = (quantity_by(month_slice(cube, month_indexes), 'order_date')
+        .reset_index()
+        .sort_values('quantity', ascending=True)
+        .head(N)
+    )
+    weekdays["order_date"] = calendar_lookup(calendar, weekdays["order_date"], "pretty_date")
+    return weekdays
+
+@timed()
+def peak_hour_view(month_indexes, cube):
+    pieces = month_slice(cube, month_indexes)
+    peak_hour_data = quantity_by(pieces, 'order_hour').reset_index()
+    total_days = sum(piece['order_date'].nunique() for piece in pieces)
+    peak_hour_data['quantity'] = peak_hour_data['quantity'] / total_days
+    labels = peak_hour_data['order_hour'].to_list()
+    values = peak_hour_data['quantity'].to_list()
+    bin2_labels = []
+    bin2_values = []
+    for i in range(0, min(14, len(labels) - 1), 2):
+        bin2_labels.append(f"{labels[i]}~{labels[i+1]}")
+        bin2_values.append(int(((values[i]+values[i+1])/2)*1000)/1000)
+    return labels, values, bin2_labels, bin2_values
+
+@timed()
+def flavors_view(N, _Ningr, ingredient_filter_list, flavors_base, ingredient_index):
+    selected_rows = ingredient_index.excluding(ingredient_filter_list)
+    pizza_sales = flavors_base[selected_rows]
+
+    topN = pizza_sales.tail(N)
+    botN = pizza_sales.head(N)
+
+    top_feature_labels, top_feature_values = ingredient_index.features(selected_rows)
+    Ningr = min(_Ningr, len(top_feature_labels))
+    return topN, botN, (top_feature_labels[-Ningr:], top_feature_values[-Ningr:]), (top_feature_labels[:Ningr], top_feature_values[:Ningr])
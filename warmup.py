@@ -0,0 +1,55 @@
+import argparse
+import os
+import threading
+
+DEFAULT_PIZZA_SCALE = 0.5
+ALL_MONTHS = list(range(1, 13))
+
+def first_tab_plots(cube):
+    from views import weekday_view, peak_hour_view
+    weekday_df = weekday_view(ALL_MONTHS, cube)
+    peak_hour_tuples = peak_hour_view(ALL_MONTHS, cube)
+    return [
+        (weekday_df.index, weekday_df['quantity']),
+        (peak_hour_tuples[2], peak_hour_tuples[3]),
+    ]
+
+def render_first_tab(cube, base_scale=DEFAULT_PIZZA_SCALE):
+    from pizza_gen import pizza_plot_png
+    for labels, values in first_tab_plots(cube):
+        pizza_plot_png(labels, values, extended_ratio=1.5, base_scale=base_scale)
+
+def warm(ingestor, base_scale=DEFAULT_PIZZA_SCALE):
+    from pizza_gen import load_pizza, image_paths
+    for pizza_path in image_paths():
+        load_pizza(pizza_path, base_scale)
+    modelo = ingestor.vendas.modelo
+    modelo.matriz
+    modelo.tabela
+    modelo.top_k_sugestoes(1, modelo.vocabulario[:1])
+
+def start_background(ingestor):
+    thread = threading.Thread(target=warm, args=(ingestor,), name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+def precompute(path, render_dir=None):
+    if render_dir is not None:
+        os.environ["PIZZA_RENDER_CACHE_DIR"] = render_dir
+    from streaming import load_sales
+    _, cube, _, _ = load_sales(path)
+    if os.environ.get("PIZZA_RENDER_CACHE_DIR"):
+        render_first_tab(cube)
+        return True
+    return False
+
+def main():
+    parser = argparse.ArgumentParser(description="Pré-computa o snapshot de partida rápida do dashboard")
+    parser.add_argument("path", nargs="?", default="pizza_dataset.xlsx")
+    parser.add_argument("--render-dir", default=os.environ.get("PIZZA_RENDER_CACHE_DIR"))
+    args = parser.parse_args()
+    if not precompute(args.path, args.render_dir):
+        print("PIZZA_RENDER_CACHE_DIR não definido: imagens da primeira aba não foram persistidas")
+
+if __name__ == "__main__":
+    main()